@@ -0,0 +1,213 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+## benchmark suite for the geometry kernels, scene updates and exports
+#
+# Runs without a GUI: figures are Agg, the demo scripts are executed with
+# plt.show() disabled and their animate() is timed directly (demos that
+# redraw inside animate() include that draw in update_ms). Results are one
+# JSON document for regression tracking, run it before and after a change
+# and compare.
+#
+#   python benchmark.py -o before.json
+#   python benchmark.py --quick --only curve scene
+#   python benchmark.py --only demo --demos demo_1.py demo_UI_ver1.1.py
+
+SAMPLES = [400, 1000, 4000, 10000]
+NS = [3, 10, 20, 40]
+BASE = {'fm': 50, 'Rm': 5, 'n': 6, 'Rd': 20, 'rd': 5, 'e': 2, 'N': 10, 'd': 10, 'D': 80}
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def timed(func, repeat=5, min_time=0.05):
+    # best of repeat runs, each run loops func until min_time has passed;
+    # ms per call
+    func()
+    best = np.inf
+    for _ in range(repeat):
+        n = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            n += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed/n)
+    return 1e3*best
+
+
+def drive(N, D=BASE['D'], **kw):
+    # a valid parameter set for N pins: keep e below the cusp e = D/(2N)
+    p = dict(BASE, N=N, D=D, **kw)
+    p['e'] = min(p['e'], 0.5*D/2/N)
+    return p
+
+
+def bench_curves(samples, ns, repeat):
+    from cycloid_geometry import PROFILES, profile_cache
+    out = []
+    for name, family in PROFILES.items():
+        for M in samples:
+            t = np.linspace(0, 2*np.pi, M)
+            for N in ns:
+                p = drive(N)
+                ms = timed(lambda: family.points(t, p['e'], N, p['D'], p['d'], lamuda=0.9), repeat)
+                out.append({'bench': 'curve', 'family': name, 'samples': M, 'N': N, 'ms': ms})
+    profile_cache.clear()
+    return out
+
+
+def bench_scene(samples, ns, repeat):
+    # one full drive scene (demo1_new) per frame: geometry update, then a
+    # complete Agg draw of the figure
+    from render_headless import make_scene
+    out = []
+    for M in samples:
+        for N in ns:
+            p = drive(N)
+            fig, scene = make_scene(p, samples=M)
+            frame = iter(range(10**9))
+            update = timed(lambda: scene.update(p, 2*np.pi*next(frame)/p['fm']), repeat)
+            draw = timed(fig.canvas.draw, repeat, min_time=0.1)
+            out.append({'bench': 'scene', 'samples': M, 'N': N, 'update_ms': update, 'draw_ms': draw})
+            plt.close(fig)
+    return out
+
+
+def bench_export(samples, ns, fm, jobs):
+    # one full output revolution, fm*(N-1) frames, to a gif in a temp dir
+    from render_headless import render, render_parallel
+    out = []
+    with tempfile.TemporaryDirectory() as folder:
+        for M in samples:
+            for N in ns:
+                p = drive(N, fm=fm)
+                frames = int(fm*(N - 1))
+                start = time.perf_counter()
+                if jobs == 1:
+                    render(p, os.path.join(folder, 'bench.gif'), samples=M)
+                else:
+                    render_parallel(p, os.path.join(folder, 'bench.gif'), samples=M, jobs=jobs)
+                total = time.perf_counter() - start
+                out.append({'bench': 'export', 'samples': M, 'N': N, 'frames': frames, 'jobs': jobs,
+                            'total_s': total, 'ms_per_frame': 1e3*total/frames})
+    return out
+
+
+def _find_slider(ns, name):
+    if 'sli_' + name in ns:
+        return ns['sli_' + name]
+    group = ns.get('sliders')
+    group = getattr(group, 'sliders', group)  # SliderCoalescer
+    if isinstance(group, dict):
+        return group.get(name)
+    return None
+
+
+def load_demo(path):
+    # run the script top to bottom with Agg and no window, return its globals
+    argv = sys.argv
+    show = plt.show
+    sys.argv = [path]
+    plt.show = lambda *a, **k: None
+    try:
+        ns = {'__name__': '__main__', '__file__': path}
+        with open(path) as f:
+            exec(compile(f.read(), path, 'exec'), ns)
+    finally:
+        sys.argv = argv
+        plt.show = show
+    if 'lod' in ns:
+        ns['lod'].idle = 0  # always measure at full resolution
+    return ns
+
+
+def bench_demos(paths, ns_list, repeat):
+    out = []
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            ns = load_demo(path)
+        except Exception as e:
+            out.append({'bench': 'demo', 'demo': name, 'error': f'{type(e).__name__}: {e}'})
+            continue
+        fig = ns['fig']
+        slider = _find_slider(ns, 'N')
+        for N in (ns_list if slider is not None else [None]):
+            row = {'bench': 'demo', 'demo': name, 'N': N}
+            try:
+                if N is not None:
+                    slider.set_val(min(max(N, slider.valmin), slider.valmax))
+                    row['N'] = slider.val
+                frame = iter(range(10**9))
+                row['update_ms'] = timed(lambda: ns['animate'](next(frame)), repeat)
+                row['draw_ms'] = timed(fig.canvas.draw, repeat, min_time=0.1)
+            except Exception as e:
+                row['error'] = f'{type(e).__name__}: {e}'
+            out.append(row)
+        plt.close('all')
+    return out
+
+
+def meta():
+    return {'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(), 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='time geometry kernels, frame updates and exports, JSON out')
+    parser.add_argument('-o', '--output', default=None, help='write the JSON here instead of stdout')
+    parser.add_argument('--only', nargs='+', choices=['curve', 'scene', 'demo', 'export'],
+                        default=['curve', 'scene', 'demo', 'export'])
+    parser.add_argument('--samples', type=int, nargs='+', default=SAMPLES)
+    parser.add_argument('--N', type=int, nargs='+', default=NS)
+    parser.add_argument('--demos', nargs='+', default=None, help='scripts to time (default: every demo)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--export-fm', type=float, default=10, help='fm for the export runs (frames = fm*(N-1))')
+    parser.add_argument('--export-N', type=int, nargs='+', default=[3, 10], help='N values for the export runs')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='worker processes for the export runs')
+    parser.add_argument('--quick', action='store_true', help='smallest and largest grid points only, 2 repeats')
+    args = parser.parse_args(argv)
+
+    samples, ns, repeat, export_ns = args.samples, args.N, args.repeat, args.export_N
+    if args.quick:
+        samples = sorted({min(samples), max(samples)})
+        ns = sorted({min(ns), max(ns)})
+        export_ns = [min(export_ns)]
+        repeat = 2
+    demos = args.demos or sorted(glob.glob(os.path.join(HERE, 'demo*.py')) +
+                                 glob.glob(os.path.join(HERE, 'Animation for*.py')))
+
+    results = []
+    stages = {'curve': lambda: bench_curves(samples, ns, repeat),
+              'scene': lambda: bench_scene(samples, ns, repeat),
+              'demo': lambda: bench_demos(demos, ns, repeat),
+              'export': lambda: bench_export(samples, export_ns, args.export_fm, args.jobs)}
+    for stage in args.only:
+        start = time.perf_counter()
+        results += stages[stage]()
+        print(f'{stage}: {time.perf_counter() - start:.1f} s', file=sys.stderr)
+
+    report = json.dumps({'meta': meta(), 'results': results}, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+        print('saved', args.output, file=sys.stderr)
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
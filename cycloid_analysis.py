@@ -0,0 +1,192 @@
+import argparse
+import numpy as np
+from cycloid_geometry import PROFILES, disc_radii, profile_base
+
+## contact analysis of the cycloid disc against the outer pin ring
+#
+# Same layout as the demos: N pins of diameter d on the pitch circle D
+# (pin_update), the disc at input angle phi rotated by -phi/(N-1) and
+# shifted by e*(cos phi, sin phi). All frames x pins are solved at once.
+
+
+def disc_outline(e, N, D, d, lamuda=None, samples=4000, family=None):
+    # closed disc outline (2, M) without the duplicated end point; with
+    # lamuda and no family the short width form of demo_7
+    t = np.linspace(0, 2*np.pi, samples, endpoint=False)
+    if family is None:
+        family = 'epitrochoid' if lamuda is None else 'short_width'
+    return profile_base(e, N, D, d, t, lamuda=lamuda, family=family)
+
+
+def _closest_on_polyline(outline, q, window):
+    # closest point of the closed polyline outline (2, M) to the points
+    # q (..., 2), searching window samples either side of the polar angle
+    M = outline.shape[1]
+    ang = np.arctan2(q[..., 1], q[..., 0]) % (2*np.pi)
+    j0 = np.rint(ang/(2*np.pi)*M).astype(int)
+    cand = (j0[..., None] + np.arange(-window, window + 1)) % M
+    px, py = outline[0][cand], outline[1][cand]
+    dist = (px - q[..., 0, None])**2 + (py - q[..., 1, None])**2
+    j = np.take_along_axis(cand, dist.argmin(-1)[..., None], -1)[..., 0]
+
+    # project onto the segments either side of the nearest vertex
+    best = None
+    for a, b in ((j - 1) % M, j), (j, (j + 1) % M):
+        A = outline[:, a].transpose(*range(1, a.ndim + 1), 0)
+        B = outline[:, b].transpose(*range(1, b.ndim + 1), 0)
+        AB = B - A
+        s = np.clip(((q - A)*AB).sum(-1)/np.maximum((AB*AB).sum(-1), 1e-300), 0, 1)
+        c = A + s[..., None]*AB
+        d2 = ((q - c)**2).sum(-1)
+        if best is None:
+            best, bd2, tan = c, d2, AB
+        else:
+            pick = d2 < bd2
+            best = np.where(pick[..., None], c, best)
+            tan = np.where(pick[..., None], AB, tan)
+            bd2 = np.where(pick, d2, bd2)
+    tan = tan/np.linalg.norm(tan, axis=-1, keepdims=True)
+    return best, tan
+
+
+def mesh_contacts(N, D, d, e, lamuda=None, frames=360, samples=4000, tol=1e-3, family=None):
+    # contact state of every pin over one input revolution, as a dict of
+    # arrays shaped (frames, N[, 2]) in the fixed pin ring frame:
+    #   contact        closest disc point to each pin
+    #   normal         outward disc normal there (line of action on the pin)
+    #   gap            pin surface to disc, 0 in contact, < 0 interference
+    #   in_contact     |gap| <= tol (mm)
+    #   pressure_angle angle between the line of action and the velocity of
+    #                  the contact point as the disc turns about its own
+    #                  centre (the torque carrying motion), radians
+    #   lever          moment arm of the line of action about the disc centre
+    N = int(N)
+    outline = disc_outline(e, N, D, d, lamuda, samples, family)
+    phi = 2*np.pi*np.arange(frames)/frames
+    ang = 2*np.pi*np.arange(N)/N
+    pins = D/2*np.stack([np.cos(ang), np.sin(ang)], -1)  # (N, 2)
+
+    # pin centres in disc coordinates: undo the shift, then the rotation
+    turn = phi/(N-1)
+    c, s = np.cos(turn)[:, None], np.sin(turn)[:, None]
+    rel = pins[None] - e*np.stack([np.cos(phi), np.sin(phi)], -1)[:, None]
+    q = np.stack([c*rel[..., 0] - s*rel[..., 1], s*rel[..., 0] + c*rel[..., 1]], -1)
+
+    # the outline wobbles around its polar angle by at most asin(e/r_min)
+    r = np.hypot(outline[0], outline[1])
+    dev = np.abs(np.angle(np.exp(1j*(np.arctan2(outline[1], outline[0]) - 2*np.pi*np.arange(samples)/samples))))
+    window = int(np.ceil(dev.max()/(2*np.pi)*samples)) + 4 + int(np.ceil(d/2/r.min()*samples/(2*np.pi)))
+    point, tan = _closest_on_polyline(outline, q, window)
+
+    # outline runs counter clockwise, outward normal is the tangent turned -90 deg
+    nrm = np.stack([tan[..., 1], -tan[..., 0]], -1)
+    gap = ((q - point)*nrm).sum(-1) - d/2
+
+    # back to the pin ring frame
+    def to_world(v, shift=True):
+        w = np.stack([c*v[..., 0] + s*v[..., 1], -s*v[..., 0] + c*v[..., 1]], -1)
+        if shift:
+            w += e*np.stack([np.cos(phi), np.sin(phi)], -1)[:, None]
+        return w
+    contact = to_world(point)
+    normal = to_world(nrm, shift=False)
+
+    # relative to the fixed pins the disc only slides along them, so the
+    # pressure angle is taken against its spin about its own centre
+    centre = e*np.stack([np.cos(phi), np.sin(phi)], -1)[:, None]
+    arm = contact - centre
+    vel = np.stack([-arm[..., 1], arm[..., 0]], -1)
+    cosa = np.abs((normal*vel).sum(-1))/np.linalg.norm(vel, axis=-1)
+    pressure = np.arccos(np.clip(cosa, 0, 1))
+    lever = np.abs(arm[..., 0]*normal[..., 1] - arm[..., 1]*normal[..., 0])
+
+    return {'phi': phi, 'pins': pins, 'contact': contact, 'normal': normal,
+            'gap': gap, 'in_contact': np.abs(gap) <= tol, 'pressure_angle': pressure,
+            'lever': lever}
+
+
+def _curvature_terms(e, N, D, sign=-1):
+    # curvature of the base epitrochoid R*(cos t, sin t) + sign*e*(cos kt, sin kt)
+    # only depends on u = cos((k-1)t):  kappa = (A + B*u)/(P + Q*u)**1.5
+    e, N, D = np.asarray(e, float), np.asarray(N, float), np.asarray(D, float)
+    R = D/2
+    rm = R/N
+    k = R/rm
+    A = R**2 + e**2*k**3
+    B = sign*e*R*k*(1 + k)
+    P = R**2 + e**2*k**2
+    Q = 2*sign*e*R*k
+    return A, B, P, Q, k, rm
+
+
+def base_curvature(e, N, D, t, sign=-1):
+    # signed curvature of the pin centre path (> 0 convex), 1/mm
+    A, B, P, Q, k, rm = _curvature_terms(e, N, D, sign)
+    u = np.cos((k - 1)*t)
+    return (A + B*u)/(P + Q*u)**1.5
+
+
+def undercut_margin(e, N, D, d, sign=-1):
+    # smallest radius of curvature of the convex parts of the base curve
+    # minus the pin radius, mm; < 0 means the d/2 offset folds over itself
+    # (undercut), -inf when e >= rm and the base curve already loops.
+    # Closed form and broadcasting, for sweeps over millions of tuples.
+    A, B, P, Q, k, rm = _curvature_terms(e, N, D, sign)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ustar = (2*B*P - 3*Q*A)/(Q*B)
+        cands = [np.ones_like(A), -np.ones_like(A), np.clip(np.nan_to_num(ustar), -1, 1)]
+        kmax = np.max([(A + B*u)/np.abs(P + Q*u)**1.5 for u in cands], axis=0)
+        margin = np.where(kmax > 0, 1/kmax, np.inf) - np.asarray(d, float)/2
+    return np.where(np.asarray(e, float) >= rm, -np.inf, margin)
+
+
+def undercut_check(e, N, D, d, sign=-1, samples=2048):
+    # single parameter set, cheap enough for every slider change
+    margin = float(undercut_margin(e, N, D, d, sign))
+    t = np.linspace(0, 2*np.pi, samples)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bad = base_curvature(e, N, D, t, sign)*(d/2) >= 1
+    if e >= disc_radii(N, D)[1]:
+        bad[:] = True
+    edges = np.flatnonzero(np.diff(bad.astype(np.int8)))
+    starts = list(t[edges[bad[edges + 1]] + 1]) if len(edges) else []
+    ends = list(t[edges[~bad[edges + 1]]]) if len(edges) else []
+    if bad[0]:
+        starts.insert(0, t[0])
+    if bad[-1]:
+        ends.append(t[-1])
+    return {'margin': margin, 'undercut': margin < 0,
+            'intervals': list(zip(starts, ends))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='contact points and pressure angles of the disc/pin mesh')
+    parser.add_argument('--N', type=int, default=10)
+    parser.add_argument('--D', type=float, default=80)
+    parser.add_argument('--d', type=float, default=10)
+    parser.add_argument('--e', type=float, default=2)
+    parser.add_argument('--la', type=float, default=None, help='short width coefficient (demo_7), default exact profile')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None,
+                        help='profile family, default epitrochoid or short_width with --la')
+    parser.add_argument('--frames', type=int, default=360)
+    parser.add_argument('--samples', type=int, default=4000)
+    parser.add_argument('--tol', type=float, default=1e-3, help='contact tolerance in mm')
+    parser.add_argument('-o', '--output', default=None, help='save all arrays to this .npz')
+    args = parser.parse_args(argv)
+    if args.profile not in (None, 'epitrochoid') and args.la is None:
+        parser.error(args.profile + ' needs --la')
+    res = mesh_contacts(args.N, args.D, args.d, args.e, args.la, args.frames, args.samples, args.tol, args.profile)
+    touching = res['in_contact']
+    alpha = np.degrees(res['pressure_angle'])
+    print(f"pins in contact per frame: {touching.sum(1).min()}..{touching.sum(1).max()} of {args.N}")
+    print(f"min gap {res['gap'].min():.4f} mm, max gap {res['gap'].max():.4f} mm")
+    print(f"undercut margin {float(undercut_margin(args.e, args.N, args.D, args.d)):.4f} mm")
+    if touching.any():
+        print(f"pressure angle in contact: {alpha[touching].min():.1f}..{alpha[touching].max():.1f} deg")
+    if args.output:
+        np.savez(args.output, **res)
+        print('saved', args.output)
+
+
+if __name__ == '__main__':
+    main()
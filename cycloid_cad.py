@@ -0,0 +1,514 @@
+import argparse
+import os
+import struct
+import numpy as np
+from cycloid_analysis import undercut_margin
+from cycloid_geometry import adaptive_t, get_profile
+from cycloid_scene import add_drive_args, drive_params
+
+## CAD export of the demo1_new drive sketch
+#
+# The disc outline is written as one closed LWPOLYLINE of tangent
+# continuous arcs (biarcs, stored as vertex bulges) or as one periodic cubic
+# B-spline with its knots bunched where the outline bends hardest, both
+# fitted to tol mm, instead of thousands of straight segments. Undercut
+# (self looping) outlines are refused rather than fitted. Everything is fitted on numpy arrays; the only Python loop left
+# is the one ezdxf needs to create each circle entity. ezdxf is only
+# imported once a DXF is written.
+#
+# The same layered sketch also goes out as SVG (one <g> per layer, arcs as
+# A and splines as C path commands, mm units, y up) and as a flat binary
+# polyline file for the laser cutter, all little-endian:
+#
+#   b'CYPL', u4 version (1), u4 layer count
+#   per layer: u2 byte length, utf-8 name
+#   u4 polyline count
+#   per polyline: u4 layer index, u4 closed flag, u4 point count
+#   float32 x, y of all points, polyline after polyline
+#
+# Circles become closed polygons and the disc an adaptive polyline, each
+# within tol of the true curve; closed polylines do not repeat their first
+# point.
+#
+#   python cycloid_cad.py --N 12 --e 1.5 -o part.dxf
+#   python cycloid_cad.py -o part.dxf --mode spline --tol 0.005
+#   python cycloid_cad.py -o part.svg
+#   python cycloid_cad.py -o part.bin --tol 0.01
+
+LAYERS = {'Cycloid': 1, 'Pins': 3, 'Eccentric': 5, 'DriveCircle': 6, 'Center': 8}
+SVG_COLORS = {1: '#ff0000', 3: '#00c000', 5: '#0000ff', 6: '#ff00ff', 8: '#808080'}  # DXF color index
+MAGIC = b'CYPL'
+POLYLINE = np.dtype([('layer', '<u4'), ('closed', '<u4'), ('count', '<u4')])
+
+
+def ring(k, R, dx=0.0, dy=0.0):
+    # (k, 2) centres of k circles evenly spaced on radius R
+    ang = 2*np.pi*np.arange(int(k))/int(k)
+    return np.stack([R*np.cos(ang) + dx, R*np.sin(ang) + dy], -1)
+
+
+def drive_sketch(p, samples=20000, family='epitrochoid'):
+    # the export_dxf_sketch layout at phi = 0: disc shifted by e along x,
+    # outer pin holes, eccentric, drive circle, inner pins and the holes
+    # they sweep in the disc. Circles are (layer, centres (k, 2), radius).
+    e, N, D, d = p['e'], int(p['N']), p['D'], p['d']
+    t = np.linspace(0, 2*np.pi, samples)
+    prof = get_profile(family)
+    outline = prof.points(t, e, N, D, d) + np.array([[e], [0.0]])
+    circles = [('Center', ring(N, D/2), d/2),
+               ('Eccentric', np.array([[e, 0.0]]), p['Rm'] + e),
+               ('DriveCircle', np.zeros((1, 2)), p['Rm']),
+               ('Pins', ring(p['n'], p['Rd']), p['rd']),
+               ('Cycloid', ring(p['n'], p['Rd'], e), p['rd'] + e)]
+    return {'p': dict(p), 'family': family, 't': t, 'outline': outline,
+            'tangents': prof.tangents(t, e, N, D, d), 'circles': circles}
+
+
+def _cross(a, b):
+    return a[..., 0]*b[..., 1] - a[..., 1]*b[..., 0]
+
+
+def _dot(a, b):
+    return (a*b).sum(-1)
+
+
+def _arc(A, B, T):
+    # arc leaving A along the unit tangent T and ending in B: bulge, centre
+    # and signed radius (inf for a straight segment)
+    c = B - A
+    half = np.arctan2(_cross(T, c), _dot(T, c))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.hypot(c[..., 0], c[..., 1])/(2*np.sin(half))
+    straight = ~np.isfinite(r) | (np.abs(half) < 1e-9)
+    r = np.where(straight, np.inf, r)
+    centre = A + np.where(straight, 0, r)[..., None]*np.stack([-T[..., 1], T[..., 0]], -1)
+    return np.tan(half/2), centre, r
+
+
+def _arc_error(q, A, B, centre, r):
+    # distance of the points q (S, k, 2) from their arc / segment
+    with np.errstate(invalid='ignore'):
+        circ = np.abs(np.hypot(*np.moveaxis(q - centre[:, None], -1, 0)) - np.abs(r)[:, None])
+    c = B - A
+    L = np.maximum(np.hypot(c[:, 0], c[:, 1]), 1e-300)
+    line = np.abs(_cross(c[:, None], q - A[:, None]))/L[:, None]
+    return np.where(np.isinf(r)[:, None], line, circ)
+
+
+def biarcs(P0, T0, P1, T1):
+    # equal tangent length biarcs between (P0, T0) and (P1, T1), all (S, 2):
+    # joint point J and the bulge of either arc. Tangents that do not allow
+    # a biarc (cusps) fall back to two straight halves.
+    v = P1 - P0
+    tt = T0 + T1
+    vt, vv, a = _dot(v, tt), _dot(v, v), _dot(tt, tt) - 4
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = np.sqrt(np.maximum(vt**2 - a*vv, 0))
+        h = np.where(np.abs(a) > 1e-12, (vt - root)/a, vv/(2*vt))
+    ok = np.isfinite(h) & (h > 0)
+    h = np.where(ok, h, 0)[:, None]
+    J = np.where(ok[:, None], 0.5*(P0 + h*T0 + P1 - h*T1), 0.5*(P0 + P1))
+    # tangent at the joint: along the middle leg of the control polygon
+    TJ = np.where(ok[:, None], v - h*tt, v)
+    T0 = np.where(ok[:, None], T0, v)
+    T0 = T0/np.maximum(np.hypot(T0[:, 0], T0[:, 1]), 1e-300)[:, None]
+    TJ = TJ/np.maximum(np.hypot(TJ[:, 0], TJ[:, 1]), 1e-300)[:, None]
+    b0, c0, r0 = _arc(P0, J, T0)
+    b1, c1, r1 = _arc(J, P1, TJ)
+    return J, (b0, c0, r0), (b1, c1, r1)
+
+
+def fit_arcs(xy, tangents, tol=1e-3, seeds=64, probes=17):
+    # (K, 3) x, y, bulge of a closed arc polyline within tol of the dense
+    # outline xy (2, M) (first point == last point). Knots are dense sample
+    # indices; every round fits all spans at once and halves those whose
+    # probes stray more than tol.
+    P, T = xy.T, tangents.T
+    M = len(P)
+    knots = np.unique(np.linspace(0, M - 1, seeds + 1).round().astype(int))
+    while True:
+        i0, i1 = knots[:-1], knots[1:]
+        J, (b0, c0, r0), (b1, c1, r1) = biarcs(P[i0], T[i0], P[i1], T[i1])
+        probe = i0[:, None] + np.rint(np.linspace(0, 1, probes)*(i1 - i0)[:, None]).astype(int)
+        q = P[probe]
+        first = _dot(q - J[:, None], (P[i1] - P[i0])[:, None]) <= 0
+        err = np.where(first, _arc_error(q, P[i0], J, c0, r0), _arc_error(q, J, P[i1], c1, r1))
+        err = np.nan_to_num(err, nan=np.inf).max(1)
+        split = (err > tol) & (i1 - i0 > 1)
+        if not split.any():
+            break
+        knots = np.union1d(knots, (i0[split] + i1[split])//2)
+    out = np.empty((2*len(i0), 3))
+    out[0::2, :2], out[0::2, 2] = P[i0], b0
+    out[1::2, :2], out[1::2, 2] = J, b1
+    return out
+
+
+def _knot(u, k):
+    # knot k of the periodic knot sequence u (n,) over 0..2pi, any integer k
+    n = len(u)
+    return u[k % n] + 2*np.pi*(k//n)
+
+
+def _bspline_basis(u, j, t):
+    # (M, 4) cubic B-spline weights of control points j-3..j for t in span
+    # [u_j, u_j+1] of the periodic knots u (de Boor's triangle, vectorized)
+    left = [None] + [t - _knot(u, j + 1 - r) for r in (1, 2, 3)]
+    right = [None] + [_knot(u, j + r) - t for r in (1, 2, 3)]
+    N = [np.ones_like(t)]
+    for r in (1, 2, 3):
+        saved = np.zeros_like(t)
+        row = []
+        for k in range(r):
+            temp = N[k]/(right[k + 1] + left[r - k])
+            row.append(saved + right[k + 1]*temp)
+            saved = left[r - k]*temp
+        N = row + [saved]
+    return np.stack(N, -1)
+
+
+def _band_solve(band, rhs):
+    # A x = rhs for symmetric positive definite A with A[i, i+k] = band[i, k],
+    # k = 0..3: banded Cholesky, one pass over the rows each way
+    m = len(band)
+    L = np.zeros((m, 4))  # L[i, k] = L(i, i-3+k)
+    for i in range(m):
+        for k in range(4):
+            j = i - 3 + k
+            if j < 0:
+                continue
+            s = band[j, i - j]
+            for c in range(max(i - 3, 0), j):
+                s -= L[i, c - i + 3]*L[j, c - j + 3]
+            L[i, k] = np.sqrt(s) if j == i else s/L[j, 3]
+    y = np.array(rhs, float)
+    for i in range(m):
+        for c in range(max(i - 3, 0), i):
+            y[i] -= L[i, c - i + 3]*y[c]
+        y[i] /= L[i, 3]
+    for i in range(m - 1, -1, -1):
+        for c in range(i + 1, min(i + 4, m)):
+            y[i] -= L[c, i - c + 3]*y[c]
+        y[i] /= L[i, 3]
+    return y
+
+
+def _periodic_solve(band, rhs):
+    # A x = rhs with A[i, (i+k) % n] = A[(i+k) % n, i] = band[i, k]. The
+    # last three unknowns take the wrap around, the rest is a plain band
+    # matrix; they are eliminated through the 3 x 3 Schur complement.
+    n = len(band)
+    m = n - 3
+    B = band[:m].copy()
+    E = np.zeros((m, 3))
+    C = np.zeros((3, 3))
+    for i in range(m - 3, n):
+        for k in range(4):
+            j = (i + k) % n
+            if i < m <= j:
+                E[i, j - m], B[i, k] = band[i, k], 0
+            elif i >= m and j < m:
+                E[j, i - m] = band[i, k]
+            elif i >= m:
+                C[i - m, j - m] = C[j - m, i - m] = band[i, k]
+    X = _band_solve(B, np.column_stack([rhs[:m], E]))
+    k = rhs.shape[1]
+    xc = np.linalg.solve(C - E.T @ X[:, k:], rhs[m:] - E.T @ X[:, :k])
+    return np.concatenate([X[:, :k] - X[:, k:] @ xc, xc])
+
+
+def _spline_fit(u, t, P):
+    # least squares control points (n, 2) of the periodic spline on knots u
+    # through the samples P (M, 2) at t
+    n = len(u)
+    j = np.searchsorted(u, t, 'right') - 1
+    w = _bspline_basis(u, j, t)
+    idx = (j[:, None] + np.arange(-3, 1)) % n
+    band = np.zeros((n, 4))
+    for a in range(4):
+        for b in range(a, 4):
+            band[:, b - a] += np.bincount(idx[:, a], w[:, a]*w[:, b], n)
+    atb = np.stack([np.bincount(idx.ravel(), (w*P[:, k, None]).ravel(), n) for k in (0, 1)], -1)
+    return _periodic_solve(band, atb)
+
+
+def spline_points(spline, t):
+    # (M, 2) points of the periodic spline at t in 0..2pi
+    u, ctrl = spline
+    j = np.searchsorted(u, t, 'right') - 1
+    idx = (j[:, None] + np.arange(-3, 1)) % len(u)
+    return (_bspline_basis(u, j, t)[..., None]*ctrl[idx]).sum(1)
+
+
+def spline_knots(curve, n, grid=2**15):
+    # n periodic knots over 0..2pi, spaced by the fourth root of |x''''|: a
+    # cubic span of length h strays ~h^4 |x''''|, so every span gets about
+    # the same error
+    h = 2*np.pi/grid
+    X = curve(h*np.arange(grid))
+    d4 = (np.roll(X, -2, 1) - 4*np.roll(X, -1, 1) + 6*X - 4*np.roll(X, 1, 1) + np.roll(X, 2, 1))/h**4
+    rho = np.hypot(*d4)**0.25
+    rho += 0.02*rho.mean()  # keeps the flat flanks from getting one huge span
+    cum = np.concatenate([[0], np.cumsum(rho)])
+    u = np.interp(cum[-1]*np.arange(n)/n, cum, h*np.arange(grid + 1))
+    return u - u[0]
+
+
+def fit_spline(curve, tol=1e-3, start=16, per_span=16, limit=2**14):
+    # (knots (n,), control points (n, 2)) of a periodic cubic B-spline over
+    # 0..2pi within tol of curve(t) -> (2, M), with as few control points as
+    # the search finds: knots from spline_knots, n grown by the fourth root
+    # of the error until the fit passes, then bisected down. Each fit takes
+    # per_span samples per span and is checked on them and halfway between.
+    s = np.arange(2*per_span)/(2*per_span)
+
+    def trial(n):
+        u = spline_knots(curve, n)
+        t = (u[:, None] + (_knot(u, np.arange(1, n + 1)) - u)[:, None]*s).ravel()
+        P = curve(t).T
+        spline = (u, _spline_fit(u, t[0::2], P[0::2]))
+        return np.hypot(*(spline_points(spline, t) - P).T).max(), spline
+
+    lo, n = max(start, 8) - 1, max(start, 8)
+    while True:
+        err, best = trial(n)
+        if err <= tol:
+            break
+        if n >= limit:
+            raise ValueError(f'no spline of up to {limit} control points is within tol = {tol:g} mm, use mode arcs')
+        lo, n = n, min(limit, max(n + 1, int(np.ceil(1.05*n*(err/tol)**0.25))))
+    hi = n
+    while hi - lo > 1:
+        mid = (lo + hi)//2
+        err, spline = trial(mid)
+        if err <= tol:
+            hi, best = mid, spline
+        else:
+            lo = mid
+    return best
+
+
+def _blossom(u, ctrl, j, args):
+    # polar form of span j of the periodic spline at the parameters args
+    # (K, 3); Bezier and clamped control points are all blossoms
+    n = len(u)
+    d = [ctrl[(j - 3 + i) % n] for i in range(4)]
+    for r in (1, 2, 3):
+        x = args[:, r - 1, None]
+        for i in range(3, r - 1, -1):
+            lo = _knot(u, j - 3 + i)[:, None]
+            a = (x - lo)/(_knot(u, j + i + 1 - r)[:, None] - lo)
+            d[i] = (1 - a)*d[i - 1] + a*d[i]
+    return d[3]
+
+
+def bezier_spans(spline):
+    # (n, 4, 2) cubic Bezier points of the n spans of the periodic spline
+    u, ctrl = spline
+    j = np.arange(len(u))
+    a, b = u[:, None], _knot(u, j + 1)[:, None]
+    return np.stack([_blossom(u, ctrl, j, np.hstack(args))
+                     for args in ((a, a, a), (a, a, b), (a, b, b), (b, b, b))], 1)
+
+
+def clamped_spline(spline):
+    # the periodic spline of fit_spline as a clamped one (control points,
+    # knots), which every CAD reader evaluates the same way: the ends 0 and
+    # 2pi at multiplicity 4, each control point the blossom at its three
+    # inner knots
+    u, ctrl = spline
+    n = len(u)
+    knots = np.concatenate([[0.0]*4, u[1:], [2*np.pi]*4])
+    i = np.arange(n + 3)
+    args = np.stack([knots[i + 1], knots[i + 2], knots[i + 3]], -1)
+    return _blossom(u, ctrl, np.clip(i, 3, n + 2) - 3, args), knots.tolist()
+
+
+def profile_entities(sketch, tol=1e-3, mode='arcs'):
+    # ('lwpolyline', (K, 3) xyb) or ('spline', (periodic knots (n,), control
+    # points (n, 2)))
+    p = sketch['p']
+    if sketch['family'] == 'epitrochoid' and undercut_margin(p['e'], p['N'], p['D'], p['d']) < 0:
+        raise ValueError('the disc outline is undercut (loops over itself), no CAD profile for it')
+    if mode == 'arcs':
+        return 'lwpolyline', fit_arcs(sketch['outline'], sketch['tangents'], tol)
+    if mode == 'spline':
+        prof = get_profile(sketch['family'])
+
+        def curve(t):
+            return prof.points(t, p['e'], int(p['N']), p['D'], p['d']) + np.array([[p['e']], [0.0]])
+        return 'spline', fit_spline(curve, tol, start=2*int(p['N']))
+    if mode == 'polyline':
+        e = p['e']
+        t = adaptive_t(e, p['N'], p['D'], p['d'], tol, family=sketch['family'])
+        xy = get_profile(sketch['family']).points(t, e, int(p['N']), p['D'], p['d'])
+        xyb = np.zeros((len(t) - 1, 3))
+        xyb[:, 0], xyb[:, 1] = xy[0, :-1] + e, xy[1, :-1]
+        return 'lwpolyline', xyb
+    raise ValueError('unknown mode: ' + mode)
+
+
+def write_dxf(sketch, path, tol=1e-3, mode='arcs'):
+    import ezdxf
+    doc = ezdxf.new()
+    doc.units = ezdxf.units.MM
+    for name, color in LAYERS.items():
+        doc.layers.new(name=name, dxfattribs={'color': color})
+    msp = doc.modelspace()
+
+    kind, data = profile_entities(sketch, tol, mode)
+    if kind == 'spline':
+        points, knots = clamped_spline(data)
+        msp.add_open_spline(points.tolist(), degree=3, knots=knots, dxfattribs={'layer': 'Cycloid'})
+    else:
+        msp.add_lwpolyline(data.tolist(), format='xyb', close=True, dxfattribs={'layer': 'Cycloid'})
+
+    for layer, centres, r in sketch['circles']:
+        attribs = {'layer': layer}
+        for c in centres.tolist():
+            msp.add_circle(c, r, dxfattribs=attribs)
+    doc.saveas(path)
+    return path
+
+
+def _format(template, rows):
+    # one % over all rows instead of a Python loop per point
+    rows = np.asarray(rows, float)
+    return (template*len(rows)) % tuple(rows.ravel())
+
+
+def svg_path(kind, data):
+    # d attribute of the closed disc outline
+    if kind == 'spline':
+        bez = bezier_spans(data)
+        return 'M%.4f %.4f' % tuple(bez[0, 0]) + _format('C%.4f %.4f %.4f %.4f %.4f %.4f', bez[:, 1:].reshape(-1, 6)) + 'Z'
+    xy, bulge = data[:, :2], data[:, 2]
+    start = 'M%.4f %.4f' % tuple(xy[0])
+    end = np.roll(xy, -1, 0)
+    if not bulge.any():
+        return start + _format('L%.4f %.4f', end) + 'Z'
+    # radius 0 draws a straight line, as the bulge 0 vertices do in DXF
+    chord = np.hypot(*(end - xy).T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(bulge == 0, 0, chord*(1 + bulge**2)/(4*np.abs(bulge)))
+    rows = np.column_stack([r, r, np.abs(bulge) > 1, bulge > 0, end])
+    return start + _format('A%.4f %.4f 0 %d %d %.4f %.4f', rows) + 'Z'
+
+
+def sketch_bounds(sketch):
+    lo, hi = sketch['outline'].min(1), sketch['outline'].max(1)
+    for layer, centres, r in sketch['circles']:
+        lo = np.minimum(lo, centres.min(0) - r)
+        hi = np.maximum(hi, centres.max(0) + r)
+    return lo, hi
+
+
+def write_svg(sketch, path, tol=1e-3, mode='arcs', stroke=0.1):
+    lo, hi = sketch_bounds(sketch)
+    lo, hi = lo - 2, hi + 2
+    w, h = hi - lo
+    kind, data = profile_entities(sketch, tol, mode)
+    groups = {name: [] for name in LAYERS}
+    groups['Cycloid'].append('<path d="%s"/>' % svg_path(kind, data))
+    for layer, centres, r in sketch['circles']:
+        rows = np.column_stack([centres, np.full(len(centres), r)])
+        groups[layer].append(_format('<circle cx="%.4f" cy="%.4f" r="%.4f"/>', rows))
+    out = ['<svg xmlns="http://www.w3.org/2000/svg" width="%.3fmm" height="%.3fmm" viewBox="%.4f %.4f %.4f %.4f">'
+           % (w, h, lo[0], -hi[1], w, h),
+           '<g transform="scale(1,-1)" fill="none" stroke-width="%g">' % stroke]
+    for name, color in LAYERS.items():
+        out.append('<g id="%s" stroke="%s">%s</g>' % (name, SVG_COLORS[color], ''.join(groups[name])))
+    out += ['</g>', '</svg>', '']
+    with open(path, 'w') as f:
+        f.write('\n'.join(out))
+    return path
+
+
+def circle_segments(r, tol):
+    # chords a circle of radius r needs to stay within tol
+    return max(8, int(np.ceil(np.pi/np.arccos(np.clip(1 - tol/r, -1, 1)))))
+
+
+def circle_polygons(centres, r, tol):
+    # (k, m, 2) closed polygons within tol of k circles of radius r
+    m = circle_segments(r, tol)
+    ang = 2*np.pi*np.arange(m)/m
+    return centres[:, None, :] + r*np.stack([np.cos(ang), np.sin(ang)], -1)
+
+
+def sketch_polylines(sketch, tol=1e-3):
+    # [(layer, (k, m, 2) closed polylines)], the disc outline as k = 1
+    outline = profile_entities(sketch, tol, 'polyline')[1][:, :2]
+    blocks = [('Cycloid', outline[None])]
+    blocks += [(layer, circle_polygons(centres, r, tol)) for layer, centres, r in sketch['circles']]
+    return blocks
+
+
+def write_polylines(sketch, path, tol=1e-3):
+    names = list(LAYERS)
+    blocks = sketch_polylines(sketch, tol)
+    table = np.concatenate([np.repeat([(names.index(layer), 1, b.shape[1])], len(b), 0) for layer, b in blocks])
+    points = np.concatenate([b.reshape(-1, 2) for layer, b in blocks])
+    with open(path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<II', 1, len(names)))
+        for name in names:
+            raw = name.encode()
+            f.write(struct.pack('<H', len(raw)) + raw)
+        f.write(struct.pack('<I', len(table)))
+        f.write(table.astype('<u4').tobytes())
+        f.write(points.astype('<f4').tobytes())
+    return path
+
+
+def read_polylines(path):
+    # [(layer, closed, (n, 2) float32)] of a write_polylines file
+    with open(path, 'rb') as f:
+        raw = f.read()
+    magic, version, count = struct.unpack_from('<4sII', raw)
+    if magic != MAGIC or version != 1:
+        raise ValueError('not a version 1 polyline file: ' + path)
+    pos, names = 12, []
+    for _ in range(count):
+        n, = struct.unpack_from('<H', raw, pos)
+        names.append(raw[pos + 2:pos + 2 + n].decode())
+        pos += 2 + n
+    count, = struct.unpack_from('<I', raw, pos)
+    table = np.frombuffer(raw, POLYLINE, count, pos + 4)
+    pos += 4 + table.nbytes
+    points = np.frombuffer(raw, '<f4', 2*int(table['count'].sum()), pos).reshape(-1, 2)
+    parts = np.split(points, np.cumsum(table['count'])[:-1])
+    return [(names[row['layer']], bool(row['closed']), part) for row, part in zip(table, parts)]
+
+
+def write_sketch(sketch, path, tol=1e-3, mode='arcs'):
+    # format from the extension: .dxf, .svg or .bin (binary polylines)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.dxf':
+        return write_dxf(sketch, path, tol, mode)
+    if ext == '.svg':
+        return write_svg(sketch, path, tol, mode)
+    if ext == '.bin':
+        return write_polylines(sketch, path, tol)
+    raise ValueError('unsupported output type: ' + path)
+
+
+def export_sketch(p, path, tol=1e-3, mode='arcs', family='epitrochoid'):
+    return write_sketch(drive_sketch(p, family=family), path, tol, mode)
+
+
+def main(argv=None):
+    parser = add_drive_args(argparse.ArgumentParser(description='export the drive sketch of demo1_new as DXF, SVG or binary polylines'))
+    parser.add_argument('-o', '--output', default='all_geometry_export.dxf', help='.dxf, .svg or .bin')
+    parser.add_argument('--mode', choices=['arcs', 'spline', 'polyline'], default='arcs',
+                        help='disc outline as biarcs (default), one B-spline or an adaptive polyline')
+    parser.add_argument('--tol', type=float, default=1e-3, help='largest deviation of the outline in mm')
+    args = parser.parse_args(argv)
+    try:
+        out = export_sketch(drive_params(args), args.output, args.tol, args.mode)
+    except ValueError as e:
+        parser.error(str(e))
+    print('saved', out)
+
+
+if __name__ == '__main__':
+    main()
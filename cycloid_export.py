@@ -0,0 +1,117 @@
+import os
+import shutil
+import subprocess
+import numpy as np
+
+## streaming frame writers for the animation exports
+#
+# Frames go out one at a time as they are rendered, so memory stays flat no
+# matter how long the clip is (matplotlib's PillowWriter keeps every frame
+# until the end).
+
+
+def grab_rgba(fig):
+    # (h, w, 4) uint8 view of the Agg canvas after a full draw
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba())
+
+
+def ffmpeg_path():
+    import matplotlib
+    path = matplotlib.rcParams['animation.ffmpeg_path']
+    return shutil.which(path)
+
+
+class FFmpegStream:
+    # raw RGBA frames piped into ffmpeg's stdin
+
+    def __init__(self, output, fps, path=None):
+        self.output = output
+        self.fps = fps
+        self.path = path or ffmpeg_path()
+        if self.path is None:
+            raise RuntimeError('ffmpeg not found, cannot write ' + output)
+        self.proc = None
+
+    def write(self, rgba):
+        if self.proc is None:
+            h, w = rgba.shape[:2]
+            cmd = [self.path, '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{w}x{h}', '-r', str(self.fps),
+                   '-i', '-', '-vcodec', 'h264', '-pix_fmt', 'yuv420p', self.output]
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self.proc.stdin.write(np.ascontiguousarray(rgba).tobytes())
+
+    def close(self):
+        if self.proc is None:
+            return
+        self.proc.stdin.close()
+        if self.proc.wait():
+            raise RuntimeError('ffmpeg failed writing ' + self.output)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GifStream:
+    # incremental gif encoder: each frame is quantized to its own palette and
+    # LZW encoded straight to the file. Frames are written opaque.
+
+    def __init__(self, output, fps, loop=0):
+        self.output = output
+        self.duration = int(1000/fps)
+        self.loop = loop
+        self.fp = open(output, 'wb')
+        self.count = 0
+
+    def write(self, rgba):
+        from PIL import Image, GifImagePlugin
+        im = Image.fromarray(np.ascontiguousarray(rgba[..., :3]), 'RGB')
+        im = im.convert('P', palette=Image.Palette.ADAPTIVE)
+        if self.count == 0:
+            header, _ = GifImagePlugin.getheader(im, info={'loop': self.loop, 'duration': self.duration})
+            for part in header:
+                self.fp.write(part)
+        for part in GifImagePlugin.getdata(im, duration=self.duration, include_color_table=True):
+            self.fp.write(part)
+        self.count += 1
+
+    def close(self):
+        if self.fp.closed:
+            return
+        self.fp.write(b';')  # trailer
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_stream(output, fps):
+    # .gif -> GifStream, .mp4 -> FFmpegStream; without ffmpeg an mp4 request
+    # falls back to a gif next to it (check stream.output for the real name)
+    ext = os.path.splitext(output)[1].lower()
+    if ext == '.gif':
+        return GifStream(output, fps)
+    if ext != '.mp4':
+        raise ValueError('unsupported output type: ' + output)
+    if ffmpeg_path() is None:
+        fallback = os.path.splitext(output)[0] + '.gif'
+        print('ffmpeg not found, writing', fallback, 'instead of', output)
+        return GifStream(fallback, fps)
+    return FFmpegStream(output, fps)
+
+
+def stream_animation(fig, func, frames, output, fps=20):
+    # func(frame) updates the figure; each frame is drawn, grabbed and
+    # handed to the encoder before the next one is rendered
+    with open_stream(output, fps) as stream:
+        for frame in range(frames):
+            func(frame)
+            stream.write(grab_rgba(fig))
+    return stream.output
@@ -0,0 +1,472 @@
+from collections import OrderedDict
+
+import numpy as np
+
+## shared geometry kernel for the cycloid drive demos
+#
+# The disc outline is evaluated once per parameter set into a (2, M) array
+# (row 0 = x, row 1 = y). Each frame then only needs one 2x2 rotation plus
+# the eccentric shift, instead of rebuilding the curve from trig.
+
+
+class TrigBasis:
+    # sin/cos tables of the sample parameter t plus the harmonic families
+    # cos(k*t), sin(k*t) for the lobe ratios. Built once per sample count
+    # and shared by every curve builder instead of a trig pass per call.
+
+    def __init__(self, t, maxharmonics=8):
+        self.t = t
+        self.key = grid_key(t)
+        self.cos = np.cos(t)
+        self.sin = np.sin(t)
+        self.cos.setflags(write=False)
+        self.sin.setflags(write=False)
+        self.maxharmonics = maxharmonics
+        self._harmonics = OrderedDict()
+
+    def harmonic(self, k):
+        # k is N, N-1, N+1, ... for the disc and pin counts; round away the
+        # float noise of (rc+rm)/rm so every caller shares one table
+        k = round(float(k), 9)
+        try:
+            pair = self._harmonics[k]
+        except KeyError:
+            kt = k*self.t
+            pair = (np.cos(kt), np.sin(kt))
+            for a in pair:
+                a.setflags(write=False)
+            self._harmonics[k] = pair
+            if len(self._harmonics) > self.maxharmonics:
+                self._harmonics.popitem(last=False)
+            return pair
+        self._harmonics.move_to_end(k)
+        return pair
+
+
+_bases = OrderedDict()
+
+
+def grid_key(t):
+    # identifies a sample grid, uniform or not (adaptive_t), for the caches
+    return (len(t), hash(np.ascontiguousarray(t, dtype=float).tobytes()))
+
+
+def trig_basis(t, maxsize=4):
+    # shared TrigBasis for this sample grid, rebuilt only when it changes
+    for basis in _bases.values():
+        if basis.t is t:
+            return basis
+    key = grid_key(t)
+    try:
+        basis = _bases[key]
+    except KeyError:
+        basis = _bases[key] = TrigBasis(t)
+        if len(_bases) > maxsize:
+            _bases.popitem(last=False)
+        return basis
+    _bases.move_to_end(key)
+    return basis
+
+
+def disc_radii(N, D):
+    RD = D/2
+    rc = (N-1)*(RD/N)
+    rm = (RD/N)
+    return rc, rm
+
+
+def ehypocycloid_base(e, N, D, d, t, sign=-1, out=None):
+    # offset epitrochoid of the cycloid disc, not rotated and not shifted.
+    # sign=-1 is the usual disc (update_ehypocycloid), sign=+1 the mirrored
+    # disc used by the B/C stages of the multi-disc demos.
+    rc, rm = disc_radii(N, D)
+    R = rc + rm
+    k = R/rm
+    if out is None:
+        out = np.empty((2, len(t)))
+    basis = trig_basis(t)
+    ct, st = basis.cos, basis.sin
+    ck, sk = basis.harmonic(k)
+
+    dxa = R*(-st - sign*(e/rm)*sk)
+    dya = R*(ct + sign*(e/rm)*ck)
+    scale = (d/2)/np.sqrt(dxa**2 + dya**2)
+
+    np.multiply(R, ct, out=out[0])
+    out[0] += sign*e*ck - scale*dya
+    np.multiply(R, st, out=out[1])
+    out[1] += sign*e*sk + scale*dxa
+    return out
+
+
+def lamuda_base(lamuda, e, N, D, d, t, out=None):
+    # lamuda modified (short width) profile, Curve_2 in demo_UI_ver1.1
+    rc, rm = disc_radii(N, D)
+    R = rc + rm
+    k = R/rm
+    if out is None:
+        out = np.empty((2, len(t)))
+    basis = trig_basis(t)
+    ct, st = basis.cos, basis.sin
+    ck, sk = basis.harmonic(k)
+    w = (d/2)/np.sqrt(1 + lamuda**2 - 2*lamuda*basis.harmonic(rc/rm)[0])
+
+    out[0] = R*ct - e*lamuda*ck - w*(ct - lamuda*ck)
+    out[1] = R*st - e*lamuda*sk - w*(st - lamuda*sk)
+    return out
+
+
+def short_width_base(lamuda, e, N, D, d, t, out=None):
+    # short width coefficient form of demo_7: the offset direction uses
+    # lamuda instead of e*N/(D/2), lamuda = e*N/(D/2) is the exact profile
+    rc, rm = disc_radii(N, D)
+    R = rc + rm
+    k = R/rm
+    if out is None:
+        out = np.empty((2, len(t)))
+    basis = trig_basis(t)
+    ct, st = basis.cos, basis.sin
+    ck, sk = basis.harmonic(k)
+    w = (d/2)/np.sqrt(1 + lamuda**2 - 2*lamuda*basis.harmonic(rc/rm)[0])
+
+    out[0] = R*ct - e*ck - w*(ct - lamuda*ck)
+    out[1] = R*st - e*sk - w*(st - lamuda*sk)
+    return out
+
+
+def lamuda_hypo_base(lamuda, e, N, D, d, t, out=None):
+    # lamuda modified hypotrochoid, the ring side partner of lamuda_base
+    # (update_hypocycloidB/D in demo_8): pins on rc = (N+1)*rm, rm = D/(2N)
+    rm = D/2/N
+    Rh = N*rm
+    if out is None:
+        out = np.empty((2, len(t)))
+    basis = trig_basis(t)
+    ct, st = basis.cos, basis.sin
+    ck, sk = basis.harmonic(N)
+    w = (d/2)/np.sqrt(1 + lamuda**2 - 2*lamuda*basis.harmonic(N + 1)[0])
+
+    out[0] = (Rh + w)*ct + lamuda*(e - w)*ck
+    out[1] = (Rh + w)*st - lamuda*(e - w)*sk
+    return out
+
+
+def pin_ring_base(N, d, D, t, out=None):
+    # N pin circles of the outer ring, (N, 2, M), same layout as pin_update
+    N = int(N)
+    ang = 2*np.arange(N)*np.pi/N
+    if out is None:
+        out = np.empty((N, 2, len(t)))
+    basis = trig_basis(t)
+    out[:, 0] = d/2*basis.sin + D/2*np.cos(ang)[:, None]
+    out[:, 1] = d/2*basis.cos + D/2*np.sin(ang)[:, None]
+    return out
+
+
+def hole_ring_base(n, r, R, t, out=None):
+    # n circles of radius r on pitch radius R, (n, 2, M), same layout as
+    # update_inner_circle (the holes in the disc for the output pins)
+    n = int(n)
+    ang = 2*np.arange(n)*np.pi/n
+    if out is None:
+        out = np.empty((n, 2, len(t)))
+    basis = trig_basis(t)
+    out[:, 0] = r*basis.cos + R*np.cos(ang)[:, None]
+    out[:, 1] = r*basis.sin + R*np.sin(ang)[:, None]
+    return out
+
+
+## profile families
+#
+# Every profile equation the demos use, behind one interface and picked by
+# name, e.g. PROFILES['lamuda'].points(t, e, N, D, d, lamuda=0.9). All
+# families take the same arguments and ignore the ones they do not use.
+# A new family is added once with register_profile() and is then available
+# to the caches, CycloidProfile, the analysis and the exporters.
+
+
+def _periodic_gradient(y, t):
+    # d/dt along the last axis; closed 0..2pi grids wrap around so the
+    # seam gets central differences too
+    if len(t) > 3 and np.isclose(t[-1] - t[0], 2*np.pi):
+        tp = np.concatenate(([t[-2] - 2*np.pi], t, [t[1] + 2*np.pi]))
+        yp = np.concatenate((y[..., -2:-1], y, y[..., 1:2]), -1)
+        return np.gradient(yp, tp, axis=-1)[..., 1:-1]
+    return np.gradient(y, t, axis=-1, edge_order=2)
+
+
+class ProfileFamily:
+
+    def __init__(self, name, build, expression):
+        self.name = name
+        self.build = build
+        self.expression = expression
+
+    def __repr__(self):
+        return f'ProfileFamily({self.name!r})'
+
+    def points(self, t, e, N, D, d, sign=-1, lamuda=None, out=None):
+        # (2, M) outline, not rotated and not shifted
+        return self.build(t, e, N, D, d, sign, lamuda, out)
+
+    def derivatives(self, t, e, N, D, d, sign=-1, lamuda=None):
+        # first and second derivative along t, second order differences
+        # on the sample grid
+        xy = self.points(t, e, N, D, d, sign, lamuda)
+        d1 = _periodic_gradient(xy, t)
+        return d1, _periodic_gradient(d1, t)
+
+    def tangents(self, t, e, N, D, d, sign=-1, lamuda=None):
+        d1 = self.derivatives(t, e, N, D, d, sign, lamuda)[0]
+        return d1/np.hypot(d1[0], d1[1])
+
+    def curvature(self, t, e, N, D, d, sign=-1, lamuda=None):
+        # signed, > 0 where the outline turns counter clockwise, 1/mm
+        d1, d2 = self.derivatives(t, e, N, D, d, sign, lamuda)
+        return (d1[0]*d2[1] - d1[1]*d2[0])/np.hypot(d1[0], d1[1])**3
+
+
+PROFILES = {}
+
+
+def register_profile(name, build, expression):
+    # build(t, e, N, D, d, sign, lamuda, out) -> (2, M)
+    PROFILES[name] = ProfileFamily(name, build, expression)
+    return PROFILES[name]
+
+
+def get_profile(name):
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise KeyError(f'unknown profile {name!r}, known: {", ".join(PROFILES)}') from None
+
+
+def default_family(lamuda=None):
+    # what the demos draw without an explicit choice
+    return 'epitrochoid' if lamuda is None else 'lamuda'
+
+
+register_profile(
+    'epitrochoid',
+    lambda t, e, N, D, d, sign, lamuda, out: ehypocycloid_base(e, N, D, d, t, sign, out),
+    'x = R cos t + s e cos Nt - d/2 nx,  y = R sin t + s e sin Nt - d/2 ny;  '
+    'R = D/2, s = sign, n = unit normal of the pin centre path')
+register_profile(
+    'lamuda',
+    lambda t, e, N, D, d, sign, lamuda, out: lamuda_base(lamuda, e, N, D, d, t, out),
+    'x = (R - w) cos t - la (e - w) cos Nt,  y = (R - w) sin t - la (e - w) sin Nt;  '
+    'R = D/2, w = d/2 / sqrt(1 + la^2 - 2 la cos (N-1)t)')
+register_profile(
+    'short_width',
+    lambda t, e, N, D, d, sign, lamuda, out: short_width_base(lamuda, e, N, D, d, t, out),
+    'x = (R - w) cos t - (e - la w) cos Nt,  y = (R - w) sin t - (e - la w) sin Nt;  '
+    'R = D/2, w = d/2 / sqrt(1 + la^2 - 2 la cos (N-1)t)')
+register_profile(
+    'lamuda_hypo',
+    lambda t, e, N, D, d, sign, lamuda, out: lamuda_hypo_base(lamuda, e, N, D, d, t, out),
+    'x = (Rh + w) cos t + la (e - w) cos Nt,  y = (Rh + w) sin t - la (e - w) sin Nt;  '
+    'Rh = D/2, w = d/2 / sqrt(1 + la^2 - 2 la cos (N+1)t)')
+
+
+def profile_base(e, N, D, d, t, sign=-1, lamuda=None, family=None):
+    return get_profile(family or default_family(lamuda)).points(t, e, N, D, d, sign, lamuda)
+
+
+def _chord_error(xy, td, t):
+    # largest distance of the dense outline xy(td) from the polyline through t
+    xy_t = np.array([np.interp(t, td, xy[0]), np.interp(t, td, xy[1])])
+    j = np.clip(np.searchsorted(t, td, side='right') - 1, 0, len(t) - 2)
+    a, b = xy_t[:, j], xy_t[:, j + 1]
+    ab = b - a
+    L = np.hypot(ab[0], ab[1])
+    L[L == 0] = 1.0
+    cross = ab[0]*(xy[1] - a[1]) - ab[1]*(xy[0] - a[0])
+    return np.nanmax(np.abs(cross/L))
+
+
+def adaptive_t(e, N, D, d, tol=0.01, sign=-1, lamuda=None, dense=20000, maxiter=8, family=None):
+    # parameter values for the disc outline such that no chord strays more
+    # than tol (mm) from the curve: points bunch up where the epitrochoid
+    # and its offset bend hard (lobe tips) and thin out along the flanks.
+    # A chord over arc length s on curvature k has sagitta ~ s**2*k/8, so
+    # the point density per unit length is sqrt(k/(8*tol)).
+    td = np.linspace(0, 2*np.pi, dense)
+    xy = profile_base(e, N, D, d, td, sign, lamuda, family)
+    seg = np.diff(xy, axis=1)
+    ds = np.hypot(seg[0], seg[1])
+    heading = np.unwrap(np.arctan2(seg[1], seg[0]))
+    turn = np.abs(np.diff(heading, prepend=heading[-1] - 2*np.pi*np.sign(heading[-1] - heading[0])))
+    k = turn/np.maximum(ds, 1e-12)
+    density = np.nan_to_num(ds*np.sqrt(k/(8*tol)))
+    level = np.concatenate(([0.0], np.cumsum(density)))
+    scale = 1.0
+    for _ in range(maxiter):
+        n = max(int(np.ceil(level[-1]*scale)), 3*int(N))
+        t = np.interp(np.linspace(0, level[-1], n + 1), level, td)
+        t[0], t[-1] = td[0], td[-1]
+        err = _chord_error(xy, td, t)
+        if err <= tol:
+            break
+        scale *= 1.1*np.sqrt(err/tol)
+    return t
+
+
+def rotation(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s], [s, c]])
+
+
+def rotate(base, angle, dx=0.0, dy=0.0, out=None):
+    # rigid motion of a (..., 2, M) outline: rotate about the origin, then shift
+    out = np.matmul(rotation(angle), base, out=out)
+    out[..., 0, :] += dx
+    out[..., 1, :] += dy
+    return out
+
+
+def disc_frame(base, e, N, phi, out=None):
+    # disc pose at input angle phi: -phi/(N-1) rotation + eccentric shift
+    return rotate(base, -phi/(N-1), e*np.cos(phi), e*np.sin(phi), out)
+
+
+def rotations(angles):
+    # (F, 2, 2) rotation matrices, one per frame
+    c, s = np.cos(angles), np.sin(angles)
+    return np.stack([np.stack([c, -s], -1), np.stack([s, c], -1)], -2)
+
+
+class Motion:
+    # rigid motion of one body over a sequence of frames. The rotation
+    # matrices and shifts for all frames are computed once up front; frame
+    # geometry is then a matmul of the cached base outline, per frame with
+    # place() (cache friendly, reuses out) or all at once with apply().
+
+    def __init__(self, angles, dx=0.0, dy=0.0):
+        angles = np.asarray(angles, dtype=float)
+        self.R = rotations(angles)
+        self.shift = np.empty((len(angles), 2))
+        self.shift[:, 0] = dx
+        self.shift[:, 1] = dy
+
+    def __len__(self):
+        return len(self.R)
+
+    def place(self, i, base, out=None):
+        out = np.matmul(self.R[i], base, out=out)
+        out[..., 0, :] += self.shift[i, 0]
+        out[..., 1, :] += self.shift[i, 1]
+        return out
+
+    def apply(self, base):
+        # (2, M) -> (F, 2, M), ring (n, 2, M) -> (F, n, 2, M). All frames
+        # are stacked into one (2F, 2) @ (2, n*M) product.
+        F = len(self.R)
+        rows = np.moveaxis(base, -2, 0)
+        out = np.dot(self.R.reshape(2*F, 2), rows.reshape(2, -1))
+        out = out.reshape((F, 2) + rows.shape[1:])
+        out += self.shift.reshape((F, 2) + (1,)*(rows.ndim - 1))
+        return np.moveaxis(out, 1, -2)
+
+
+def disc_motion(e, N, phis):
+    # disc poses for a sequence of input angles, see disc_frame
+    phis = np.asarray(phis, dtype=float)
+    return Motion(-phis/(N-1), e*np.cos(phis), e*np.sin(phis))
+
+
+class ProfileCache:
+    # LRU cache of un-rotated outlines, keyed on the parameters that shape
+    # them (plus the sample count), so slider round trips are lookups.
+    # Bounded by the bytes of the cached arrays, not their number: a pin
+    # ring of N=40 at 10000 samples alone is 6.4 MB. The newest entry is
+    # always kept, even when it is larger than max_bytes on its own.
+
+    def __init__(self, max_bytes=64*2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, build):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            value = build()
+            value.setflags(write=False)
+            self._data[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.max_bytes and len(self._data) > 1:
+                self.nbytes -= self._data.popitem(last=False)[1].nbytes
+            return value
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def profile(self, e, N, D, d, t, sign=-1, lamuda=None, family=None):
+        family = family or default_family(lamuda)
+        key = (family, sign, N, D, d, e, lamuda, trig_basis(t).key)
+        return self.get(key, lambda: profile_base(e, N, D, d, t, sign, lamuda, family))
+
+    def adaptive(self, e, N, D, d, tol, sign=-1, lamuda=None, family=None):
+        # (t, outline) on the adaptive grid for this parameter set
+        family = family or default_family(lamuda)
+        key = ('adaptive', family, sign, N, D, d, e, lamuda, tol)
+        t = self.get(key, lambda: adaptive_t(e, N, D, d, tol, sign, lamuda, family=family))
+        return t, self.profile(e, N, D, d, t, sign, lamuda, family)
+
+    def pin_ring(self, N, d, D, t):
+        key = ('pins', int(N), d, D, trig_basis(t).key)
+        return self.get(key, lambda: pin_ring_base(N, d, D, t))
+
+    def hole_ring(self, n, r, R, t):
+        key = ('holes', int(n), r, R, trig_basis(t).key)
+        return self.get(key, lambda: hole_ring_base(n, r, R, t))
+
+    def clear(self):
+        self._data.clear()
+        self.nbytes = 0
+        self.hits = self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data),
+                'nbytes': self.nbytes, 'max_bytes': self.max_bytes}
+
+
+profile_cache = ProfileCache()
+
+
+class CycloidProfile:
+    # one disc outline: the base comes from the shared cache, the frame
+    # buffer is preallocated and reused every tick. With tol set the
+    # outline uses adaptive_t samples instead of the fixed t. family picks
+    # the profile equation by name (PROFILES), default as profile_base.
+
+    def __init__(self, t, sign=-1, cache=None, tol=None, family=None):
+        self.t = t
+        self.sign = sign
+        self.tol = tol
+        self.family = family
+        self.cache = profile_cache if cache is None else cache
+        self.base = None
+        self.frame = np.empty((2, len(t)))
+
+    def update(self, e, N, D, d, lamuda=None):
+        if self.tol is None:
+            self.base = self.cache.profile(e, N, D, d, self.t, self.sign, lamuda, self.family)
+            return self.base
+        t, self.base = self.cache.adaptive(e, N, D, d, self.tol, self.sign, lamuda, self.family)
+        if self.frame.shape != self.base.shape:
+            self.frame = np.empty(self.base.shape)
+        return self.base
+
+    def resample(self, t):
+        # switch sample grids (level of detail), the next update() refetches
+        self.t = t
+        self.base = None
+        self.frame = np.empty((2, len(t)))
+
+    def place(self, angle, dx=0.0, dy=0.0):
+        return rotate(self.base, angle, dx, dy, out=self.frame)
@@ -0,0 +1,66 @@
+## slider -> geometry dependency graph for the interactive demos
+#
+# Every slider is an input, every piece of geometry a node computed from
+# inputs and/or other nodes. set() marks the nodes downstream of the changed
+# slider dirty and returns them; a node is only recomputed when it is read
+# while dirty. Moving Rm then never touches the cycloid profile, and rd only
+# the inner pins and inner circles.
+#
+#   graph = DependencyGraph(Rm=5, e=2, ...)
+#   graph.node('disc', ['e', 'N', 'D', 'd'], profile.update)
+#   dirty = graph.set('e', 2.5)      # {'disc', ...}
+#   base = graph['disc']
+
+
+class DependencyGraph:
+
+    def __init__(self, **values):
+        self.values = dict(values)
+        self.funcs = {}
+        self.inputs = {}
+        self.users = {}  # name -> nodes reading it
+        self.cache = {}
+        self.dirty = set()
+
+    def node(self, name, inputs, func):
+        for k in inputs:
+            if k not in self.values and k not in self.funcs:
+                raise KeyError(f'unknown input {k!r} of node {name!r}')
+            self.users.setdefault(k, []).append(name)
+        self.funcs[name] = func
+        self.inputs[name] = list(inputs)
+        self.dirty.add(name)
+        return self
+
+    def downstream(self, name):
+        out = set()
+        todo = list(self.users.get(name, ()))
+        while todo:
+            k = todo.pop()
+            if k not in out:
+                out.add(k)
+                todo.extend(self.users.get(k, ()))
+        return out
+
+    def set(self, name, value):
+        # new slider value, returns the nodes it invalidated
+        if self.values[name] == value:
+            return set()
+        self.values[name] = value
+        stale = self.downstream(name)
+        self.dirty |= stale
+        return stale
+
+    def update(self, **values):
+        stale = set()
+        for k, v in values.items():
+            stale |= self.set(k, v)
+        return stale
+
+    def __getitem__(self, name):
+        if name in self.values:
+            return self.values[name]
+        if name in self.dirty:
+            self.cache[name] = self.funcs[name](*[self[k] for k in self.inputs[name]])
+            self.dirty.discard(name)
+        return self.cache[name]
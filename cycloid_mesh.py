@@ -0,0 +1,243 @@
+import argparse
+import struct
+import numpy as np
+from cycloid_cad import circle_polygons, circle_segments
+from cycloid_geometry import adaptive_t, default_family, get_profile, rotate
+from cycloid_scene import add_drive_args, drive_params
+
+## 3D mesh of the drive stack and binary STL export
+#
+# Every part is a straight extrusion of a 2D region: the disc (cycloid
+# outline minus the inner pin holes and the eccentric bore) once per stage,
+# and the outer and inner (output) pins as cylinders through the whole
+# stack. Stage k sits at input angle phi + offsets[k]; with the default
+# offsets (evenly spread, 180 deg for two discs) the discs balance each
+# other. Meshes are (vertices (V, 3), faces (F, 3)) with outward, counter
+# clockwise faces and shared vertices, so every part is closed.
+#
+# Side walls, caps and the copies of a cylinder are all built by index
+# arithmetic on whole arrays, there is no loop over triangles: the cap of a
+# disc is two strips of quads between rays from its centre (disc_region),
+# the cap of a pin a fan.
+#
+#   python cycloid_mesh.py --N 10 --stages 2 --thickness 6 -o gearbox.stl
+#   python cycloid_mesh.py --stages 3 --phi 30 --split -o stack.stl
+
+STL_TRIANGLE = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+
+
+def _polar(xy):
+    return np.arctan2(xy[..., 1], xy[..., 0]) % (2*np.pi)
+
+
+def _cross(u, v):
+    return u[..., 0]*v[..., 1] - u[..., 1]*v[..., 0]
+
+
+def prism(pts, loops, cap, z0, z1):
+    # closed straight extrusion of a 2D region: points (P, 2), boundary
+    # loops as index arrays with the region on their left (outer loop
+    # counter clockwise, holes clockwise) and the counter clockwise cap
+    P = len(pts)
+    verts = np.concatenate([np.column_stack([pts, np.full(P, z0)]), np.column_stack([pts, np.full(P, z1)])])
+    a = np.concatenate(loops)
+    b = np.concatenate([np.roll(loop, -1) for loop in loops])
+    faces = np.concatenate([cap[:, ::-1], cap + P, np.stack([a, b, b + P], -1), np.stack([a, b + P, a + P], -1)])
+    return verts, faces
+
+
+def cylinders(centres, r, z0, z1, tol=1e-3):
+    # k closed cylinders, one fan capped template copied to every centre
+    ring = circle_polygons(np.zeros((1, 2)), r, tol)[0]
+    m = len(ring)
+    j = np.arange(m)
+    verts, faces = prism(np.concatenate([ring, [[0, 0]]]), [j], np.stack([np.full(m, m), j, (j + 1) % m], -1), z0, z1)
+    centres = np.asarray(centres, float)
+    shift = np.zeros((len(centres), 1, 3))
+    shift[:, 0, :2] = centres
+    offset = len(verts)*np.arange(len(centres))[:, None, None]
+    return (verts[None] + shift).reshape(-1, 3), (faces[None] + offset).reshape(-1, 3)
+
+
+def _strip(a, b):
+    # counter clockwise triangles between two loops sampled on the same rays,
+    # a inside b; every quad between neighbouring rays is convex
+    a1, b1 = np.roll(a, -1), np.roll(b, -1)
+    return np.concatenate([np.stack([a, b1, a1], -1), np.stack([a, b, b1], -1)])
+
+
+def disc_region(p, offset=0.0, tol=1e-3, family=None, lamuda=None):
+    # points, wall loops and cap of one disc in the disc frame: cycloid
+    # outline minus the n inner pin holes and the eccentric bore. The holes
+    # of a disc running offset ahead of the first one sit offset/(N-1)
+    # further round, so all discs drive the same output pins.
+    #
+    # All boundaries are star shaped about the disc centre, so everything is
+    # sampled on one set of rays: the outline's own vertices, the hole and
+    # bore sampling and the two rays tangent to each hole. The circle of
+    # radius sqrt(Rd^2 - rh^2) touches those tangent points and runs inside
+    # every hole in between, splitting the cap into two radial strips, bore
+    # to near side of the holes and far side of the holes to outline.
+    e, N, D, d, n = p['e'], int(p['N']), p['D'], p['d'], int(p['n'])
+    Rd, rh, rb = p['Rd'], p['rd'] + e, p['Rm'] + e
+    if Rd - rh <= rb:
+        raise ValueError('the inner pin holes cut into the eccentric bore')
+    if n > 1 and rh >= Rd*np.sin(np.pi/n):
+        raise ValueError('the inner pin holes overlap')
+
+    family = family or default_family(lamuda)
+    t = adaptive_t(e, N, D, d, tol, lamuda=lamuda, family=family)
+    outline = get_profile(family).points(t, e, N, D, d, lamuda=lamuda)[:, :-1].T
+    for outline in (outline, outline[::-1]):
+        ang = _polar(outline)
+        k = np.argmin(ang)
+        outline, ang = np.roll(outline, -k, 0), np.roll(ang, -k)
+        if (np.diff(ang) > 0).all():
+            break
+    else:
+        raise ValueError('the disc outline is not star shaped about its centre')
+
+    alpha = 2*np.pi*np.arange(n)/n + offset/(N - 1)
+    beta = np.arcsin(rh/Rd)
+    rho = np.sqrt(Rd**2 - rh**2)
+    psi0 = np.arctan2(rho, -rh)
+    mh = circle_segments(rh, tol)
+    far, near = max(2, int(np.ceil(mh*psi0/np.pi))), max(2, int(np.ceil(mh*(1 - psi0/np.pi))))
+    psi = np.concatenate([psi0*np.linspace(-1, 1, far + 1), psi0 + 2*(np.pi - psi0)*np.arange(1, near)/near])
+    hole = np.arctan2(rh*np.sin(psi), Rd + rh*np.cos(psi))
+    mb = circle_segments(rb, tol)
+    theta = np.concatenate([ang, (alpha[:, None] + hole).ravel(), (alpha[:, None] + [-beta, beta]).ravel(),
+                            2*np.pi*np.arange(mb)/mb]) % (2*np.pi)
+
+    # snap to the tangent rays, then one ray per distinct angle
+    j = np.rint((theta - alpha[0])*n/(2*np.pi)).astype(int) % n
+    dlt = (theta - alpha[j] + np.pi) % (2*np.pi) - np.pi
+    edge = np.abs(np.abs(dlt) - beta) < 1e-9
+    dlt[edge] = np.copysign(beta, dlt[edge])
+    theta = (alpha[j] + dlt) % (2*np.pi)
+    order = np.argsort(theta)
+    theta, j, dlt = theta[order], j[order], dlt[order]
+    keep = np.diff(theta, append=theta[0] + 2*np.pi) > 1e-12
+    theta, j, dlt = theta[keep], j[keep], dlt[keep]
+    G = len(theta)
+
+    inner = np.abs(dlt) < beta - 1e-9
+    root = np.sqrt(np.maximum(rh**2 - (Rd*np.sin(dlt))**2, 0))
+    r1 = np.where(inner, Rd*np.cos(dlt) - root, rho)
+    r2 = np.where(inner, Rd*np.cos(dlt) + root, rho)
+    ray = np.stack([np.cos(theta), np.sin(theta)], -1)
+    i = np.searchsorted(ang, theta, 'right') - 1
+    A, B = outline[i % len(outline)], outline[(i + 1) % len(outline)]
+    rim = A + (_cross(ray, A)/_cross(ray, A - B))[:, None]*(B - A)
+    if (np.hypot(*rim.T) <= r2).any():
+        raise ValueError('the inner pin holes cut through the disc outline')
+
+    pts = np.concatenate([rb*ray, rim, r1[:, None]*ray, r2[inner, None]*ray[inner]])
+    bore = np.arange(G)
+    outer = G + bore
+    mid1 = 2*G + bore
+    mid2 = mid1.copy()
+    mid2[inner] = 3*G + np.arange(inner.sum())
+    loops = [outer, bore[::-1]]
+    for k in range(n):
+        ks = np.flatnonzero((j == k) & (np.abs(dlt) <= beta))
+        ks = ks[np.argsort(dlt[ks])]
+        loops.append(np.concatenate([mid2[ks], mid1[ks[-2:0:-1]]])[::-1])
+    cap = np.concatenate([_strip(bore, mid1), _strip(mid2, outer)])
+    return pts, loops, cap
+
+
+def merge(meshes):
+    counts = np.cumsum([0] + [len(v) for v, f in meshes])
+    return (np.concatenate([v for v, f in meshes]),
+            np.concatenate([f + c for (v, f), c in zip(meshes, counts)]))
+
+
+def place(mesh, angle, dx=0.0, dy=0.0):
+    verts, faces = mesh
+    out = verts.copy()
+    out[:, :2] = rotate(verts[:, :2].T, angle, dx, dy).T
+    return out, faces
+
+
+def gearbox_parts(p, stages=2, thickness=5.0, gap=0.5, phi=0.0, offsets=None, tol=1e-3, family=None, lamuda=None):
+    # {name: (vertices, faces)}: disc_1..disc_<stages>, pins, output_pins
+    N = int(p['N'])
+    if offsets is None:
+        offsets = 2*np.pi*np.arange(stages)/stages
+    height = stages*thickness + (stages - 1)*gap
+    parts = {}
+    for k, off in enumerate(offsets):
+        z0 = k*(thickness + gap)
+        disc = prism(*disc_region(p, off, tol, family, lamuda), z0, z0 + thickness)
+        a = phi + off
+        parts[f'disc_{k + 1}'] = place(disc, -a/(N - 1), p['e']*np.cos(a), p['e']*np.sin(a))
+    ang = 2*np.pi*np.arange(N)/N
+    parts['pins'] = cylinders(p['D']/2*np.stack([np.cos(ang), np.sin(ang)], -1), p['d']/2, 0, height, tol)
+    n = int(p['n'])
+    ang = 2*np.pi*np.arange(n)/n - phi/(N - 1)
+    parts['output_pins'] = cylinders(p['Rd']*np.stack([np.cos(ang), np.sin(ang)], -1), p['rd'], 0, height, tol)
+    return parts
+
+
+def write_stl(path, mesh, header=b'cycloidal drive'):
+    verts, faces = mesh
+    tri = verts[faces]
+    normal = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    normal /= np.maximum(np.linalg.norm(normal, axis=1, keepdims=True), 1e-300)
+    rec = np.zeros(len(faces), STL_TRIANGLE)
+    rec['normal'] = normal
+    rec['vertices'] = tri
+    with open(path, 'wb') as f:
+        f.write(header[:80].ljust(80, b' '))
+        f.write(struct.pack('<I', len(rec)))
+        f.write(rec.tobytes())
+    return path
+
+
+def read_stl(path):
+    # (F, 3, 3) float32 triangles of a binary STL
+    with open(path, 'rb') as f:
+        raw = f.read()
+    count, = struct.unpack_from('<I', raw, 80)
+    return np.frombuffer(raw, STL_TRIANGLE, count, 84)['vertices']
+
+
+def main(argv=None):
+    parser = add_drive_args(argparse.ArgumentParser(description='extrude the drive stack and write binary STL'))
+    parser.add_argument('-o', '--output', default='gearbox.stl')
+    parser.add_argument('--stages', type=int, default=2, help='number of stacked discs')
+    parser.add_argument('--thickness', type=float, default=5.0, help='disc thickness in mm')
+    parser.add_argument('--gap', type=float, default=0.5, help='axial gap between discs in mm')
+    parser.add_argument('--phi', type=float, default=0.0, help='input angle in degrees')
+    parser.add_argument('--offsets', type=float, nargs='+', default=None,
+                        help='eccentric phase of every disc in degrees (default evenly spread)')
+    parser.add_argument('--tol', type=float, default=1e-3, help='largest deviation of every outline in mm')
+    parser.add_argument('--profile', default=None, help='profile family of the discs (default epitrochoid, '
+                        'lamuda with --lamuda)')
+    parser.add_argument('--lamuda', type=float, default=None, help='lamuda of the lamuda profile families')
+    parser.add_argument('--split', action='store_true', help='one STL per part, <output>_<part>.stl')
+    args = parser.parse_args(argv)
+    offsets = None
+    if args.profile not in (None, 'epitrochoid') and args.lamuda is None:
+        parser.error(f'--profile {args.profile} needs --lamuda')
+    if args.offsets is not None:
+        if len(args.offsets) != args.stages:
+            parser.error(f'--offsets needs {args.stages} values')
+        offsets = np.radians(args.offsets)
+    try:
+        parts = gearbox_parts(drive_params(args), args.stages, args.thickness, args.gap, np.radians(args.phi),
+                              offsets, args.tol, args.profile, args.lamuda)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+    if args.split:
+        root = args.output[:-4] if args.output.lower().endswith('.stl') else args.output
+        for name, mesh in parts.items():
+            print('saved', write_stl(f'{root}_{name}.stl', mesh), len(mesh[1]), 'triangles')
+    else:
+        mesh = merge(list(parts.values()))
+        print('saved', write_stl(args.output, mesh), len(mesh[1]), 'triangles')
+
+
+if __name__ == '__main__':
+    main()
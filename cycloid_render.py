@@ -0,0 +1,275 @@
+import os
+import tempfile
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+from matplotlib.collections import LineCollection
+
+## rendering helpers shared by the animation demos
+
+
+def ring_collection(ax, color, **kwargs):
+    # a whole ring of circles (pins, inner pins, holes) as one artist
+    coll = LineCollection([], colors=color, **kwargs)
+    ax.add_collection(coll, autolim=False)
+    return coll
+
+
+def set_ring(coll, ring):
+    # ring is (n, 2, M) from cycloid_geometry, segments want (n, M, 2)
+    coll.set_segments(ring.transpose(0, 2, 1))
+
+
+@contextmanager
+def deferred_draw(fig):
+    # every widget asks for a redraw while it is built (Slider even sets its
+    # initial value through set_val), and on non-interactive canvases
+    # draw_idle draws right away; collect them into one redraw at the end
+    canvas = fig.canvas
+    draw_idle = canvas.draw_idle
+    canvas.draw_idle = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        canvas.draw_idle = draw_idle
+        draw_idle()
+
+
+class BlitAnimation:
+    # timer driven replacement for FuncAnimation(..., blit=True).
+    #
+    # func(frame) returns the artists that moved this frame; only those are
+    # redrawn on top of a cached background. The background (axes, sliders,
+    # fixed pin ring, ...) is grabbed again on every full canvas draw, so
+    # after changing static geometry call invalidate() instead of drawing
+    # every frame.
+
+    def __init__(self, fig, func, frames, interval=50, artists=()):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.func = func
+        self.frames = int(frames)
+        self.frame = 0
+        self.artists = list(artists)
+        # backends without copy_from_bbox just redraw the whole figure
+        self.blit = getattr(self.canvas, 'supports_blit', False)
+        for a in self.artists:
+            a.set_animated(self.blit)
+        self._background = None
+        self._draw_id = self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.event_source = self.canvas.new_timer(interval=interval)
+        self.event_source.add_callback(self._step)
+        self.event_source.start()
+
+    def _on_draw(self, event):
+        if not self.blit:
+            return
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists(self.artists)
+
+    def _draw_artists(self, artists):
+        for a in artists:
+            if a.get_visible():
+                a.axes.draw_artist(a)
+
+    def _step(self):
+        changed = self.func(self.frame)
+        self.frame = (self.frame + 1) % max(self.frames, 1)
+        if self._background is None:
+            # first draw still pending, or no blitting on this backend
+            self.canvas.draw_idle()
+            return
+        drawn = self.artists if changed is None else changed
+        self.canvas.restore_region(self._background)
+        self._draw_artists(drawn)
+        for ax in {a.axes for a in drawn}:
+            self.canvas.blit(ax.bbox)
+
+    def invalidate(self):
+        # static geometry or the view changed: redraw everything once and
+        # re-grab the background in the following draw_event
+        self.canvas.draw_idle()
+
+    def pause(self):
+        self.event_source.stop()
+
+    def resume(self):
+        self.event_source.start()
+
+
+def _remove_tape(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # still mapped by an artist on windows, left to the temp dir
+
+
+class FrameTape:
+    # one period of an animation, recorded the first time round and played
+    # back by index afterwards. Every moving artist's vertices for a frame
+    # are one row of a contiguous (frames, K) array, memory mapped to a
+    # temp file when it would exceed max_bytes. Playback only hands views
+    # to set_data / set_segments, no geometry is evaluated.
+    #
+    # key is anything that identifies the inputs (slider values, modes);
+    # check() drops the recording as soon as it changes.
+
+    def __init__(self, artists, max_bytes=256*2**20, dtype=np.float32, folder=None):
+        self.artists = list(artists)
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self.folder = folder
+        self.key = None
+        self.frames = 0
+        self.data = None
+        self.filled = None
+        self._shapes = None
+        self._views = None
+        self._file = None
+
+    def check(self, key, frames):
+        if key != self.key or frames != self.frames:
+            self.reset(key, frames)
+
+    def reset(self, key=None, frames=0):
+        self.key = key
+        self.frames = int(frames)
+        self.data = None
+        self._shapes = None
+        self._views = None
+        self.filled = np.zeros(self.frames, bool)
+        if self._file is not None:
+            self._file()  # removes the temp file once, then detaches
+            self._file = None
+
+    def has(self, frame):
+        return self.data is not None and self.filled[frame]
+
+    def _grab(self, a):
+        if isinstance(a, LineCollection):
+            return np.array([p.vertices for p in a.get_paths()], float).reshape(-1, 2)
+        return np.asarray(a.get_xydata(), float)
+
+    def _allocate(self, shapes):
+        K = sum(n for n, _ in shapes)*2
+        nbytes = self.frames*K*self.dtype.itemsize
+        if nbytes > self.max_bytes:
+            fd, path = tempfile.mkstemp(suffix='.tape', dir=self.folder)
+            os.close(fd)
+            # runs on reset, when the tape is collected or at exit, whichever
+            # comes first, without keeping the tape alive
+            self._file = weakref.finalize(self, _remove_tape, path)
+            self.data = np.memmap(path, self.dtype, 'w+', shape=(self.frames, K))
+        else:
+            self.data = np.empty((self.frames, K), self.dtype)
+        self._shapes = shapes
+        self._views = []
+        start = 0
+        for n, segs in shapes:
+            stop = start + 2*n
+            self._views.append((start, stop, segs))
+            start = stop
+
+    def record(self, frame):
+        grabbed = [self._grab(a) for a in self.artists]
+        shapes = [(len(g), len(a.get_paths()) if isinstance(a, LineCollection) else 0)
+                  for a, g in zip(self.artists, grabbed)]
+        if shapes != self._shapes:
+            # first frame, or vertex counts changed under the same key
+            self.reset(self.key, self.frames)
+            self._allocate(shapes)
+        row = self.data[frame]
+        for g, (start, stop, _) in zip(grabbed, self._views):
+            row[start:stop] = g.ravel()
+        self.filled[frame] = True
+
+    def play(self, frame):
+        row = self.data[frame]
+        for a, (start, stop, segs) in zip(self.artists, self._views):
+            xy = row[start:stop].reshape(-1, 2)
+            if isinstance(a, LineCollection):
+                a.set_segments(xy.reshape(segs, -1, 2) if segs else [])
+            else:
+                a.set_data(xy[:, 0], xy[:, 1])
+
+
+class SliderCoalescer:
+    # slider events only store the latest value; flush(), called once per
+    # animation tick, hands everything that changed since the last tick to
+    # apply(changed) in one go. Sliders stop redrawing the figure on every
+    # mouse motion (drawon=False), apply() is expected to redraw once.
+    #
+    # budget (s) spaces applies further apart for very heavy scenes. The
+    # time from the oldest pending event to the next finished canvas draw
+    # is kept as the drag-to-pixels latency.
+
+    def __init__(self, sliders, apply, budget=0.0, history=256):
+        self.sliders = dict(sliders)
+        self.apply = apply
+        self.budget = budget
+        self.pending = {}
+        self.first = None
+        self.last = -np.inf
+        self.waiting = []
+        self.events = 0
+        self.applies = 0
+        self.latency = deque(maxlen=history)
+        for name, sli in self.sliders.items():
+            sli.drawon = False
+            sli.on_changed(lambda val, name=name: self.push(name, val))
+        canvas = next(iter(self.sliders.values())).ax.figure.canvas
+        self._draw_id = canvas.mpl_connect('draw_event', lambda event: self.presented())
+
+    def push(self, name, val):
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.pending[name] = val
+        self.events += 1
+
+    def flush(self):
+        now = time.perf_counter()
+        if not self.pending or now - self.last < self.budget:
+            return False
+        changed, self.pending = self.pending, {}
+        self.waiting.append(self.first)
+        self.first = None
+        self.last = now
+        self.applies += 1
+        self.apply(changed)
+        return True
+
+    def presented(self):
+        # call after blitting if apply() does not trigger a full draw
+        now = time.perf_counter()
+        self.latency.extend(now - t0 for t0 in self.waiting)
+        self.waiting = []
+
+    def stats(self):
+        ms = 1e3*np.array(self.latency) if self.latency else np.zeros(1)
+        return {'events': self.events, 'applies': self.applies,
+                'latency_ms': {'mean': float(ms.mean()), 'p50': float(np.percentile(ms, 50)),
+                               'p95': float(np.percentile(ms, 95)), 'max': float(ms.max())}}
+
+
+class LevelOfDetail:
+    # coarse sample grid while the user is busy (touch() on every input, or
+    # animating=True), the full grid once input has been idle for idle
+    # seconds. Exports never go through this and always use the full t.
+
+    def __init__(self, t, coarse=512, idle=0.5, animating=False):
+        self.full = t
+        self.coarse = np.linspace(t[0], t[-1], coarse) if coarse < len(t) else t
+        self.idle = idle
+        self.animating = animating
+        self.last = -np.inf
+
+    def touch(self):
+        self.last = time.perf_counter()
+
+    def busy(self):
+        return self.animating or time.perf_counter() - self.last < self.idle
+
+    def t(self):
+        return self.coarse if self.busy() else self.full
@@ -0,0 +1,112 @@
+import numpy as np
+from cycloid_geometry import CycloidProfile, Motion, disc_motion, profile_cache, rotate, trig_basis
+from cycloid_render import ring_collection, set_ring
+
+## single disc drive scene (demo1_new), shared by the interactive demo and
+## the headless renderer so both draw exactly the same frames
+
+
+def add_drive_args(parser):
+    parser.add_argument('--fm', type=float, default=50)
+    parser.add_argument('--Rm', type=float, default=5)
+    parser.add_argument('--n', type=int, default=6)
+    parser.add_argument('--Rd', type=float, default=20)
+    parser.add_argument('--rd', type=float, default=5)
+    parser.add_argument('--e', type=float, default=2)
+    parser.add_argument('--N', type=int, default=10)
+    parser.add_argument('--d', type=float, default=10)
+    parser.add_argument('--D', type=float, default=80)
+    return parser
+
+
+def drive_params(args):
+    # same dict as demo1_new get_params()
+    return {k: getattr(args, k) for k in ['fm', 'Rm', 'n', 'Rd', 'rd', 'e', 'N', 'd', 'D']}
+
+
+class DriveScene:
+
+    def __init__(self, ax, t, tol=None):
+        self.ax = ax
+        self.t = t
+        self.basis = trig_basis(t)
+        self.pins = ring_collection(ax, 'k')
+        self.inner_pins = ring_collection(ax, 'g')
+        self.d0, = ax.plot([], [], 'k-')  # Drive circle
+        self.inner_circles = ring_collection(ax, 'r')
+        self.inner_pin, = ax.plot([], [], 'r-')
+        self.dot, = ax.plot([], [], 'ro', ms=5)
+        self.ehypocycloid, = ax.plot([], [], 'r-')
+        self.edot, = ax.plot([], [], 'ro', ms=5)
+        self.profile = CycloidProfile(t, tol=tol)
+        self.moving = [self.inner_pins, self.inner_circles, self.inner_pin,
+                       self.dot, self.ehypocycloid, self.edot]
+
+    def set_static(self, p):
+        # title, view, fixed pin ring and drive circle
+        self.ax.set_title(f"Reduction ratio {p['N'] - 1}:1")
+        self.ax.set_xlim(-1.2*0.5*p['D'], 1.2*0.5*p['D'])
+        self.ax.set_ylim(-1.2*0.5*p['D'], 1.2*0.5*p['D'])
+        self.pin_update(p['N'], p['d'], p['D'])
+        self.drive_pin_update(p['Rm'])
+
+    def update(self, p, phi):
+        self.update_inner_pin(p['e'], p['Rm'], phi)
+        self.inner_pin_update(p['n'], p['N'], p['rd'], p['Rd'], phi)
+        self.update_inner_circle(p['e'], p['n'], p['N'], p['rd'], p['Rd'], phi)
+        self.update_ehypocycloid(p['e'], p['N'], p['D'], p['d'], phi)
+        return self.moving
+
+    def play(self, p, frames):
+        # same frames as update(), for exports: base outlines are fetched
+        # once, the poses of all frames come from one Motion per body and
+        # each frame is a matmul into reused buffers. Yields each frame once
+        # its artists are set.
+        frames = np.asarray(frames)
+        phis = 2*np.pi*frames/p['fm']
+        e, N, Rm = p['e'], p['N'], p['Rm']
+        disc = self.profile.update(e, N, p['D'], p['d'])
+        pins = profile_cache.pin_ring(p['n'], 2*p['rd'], 2*p['Rd'], self.t)
+        holes = profile_cache.hole_ring(p['n'], p['rd']+e, p['Rd'], self.t)
+        eccentric = np.array([(Rm+e)*self.basis.cos, (Rm+e)*self.basis.sin])
+        motion = disc_motion(e, N, phis)
+        turn = Motion(-phis/(N-1))
+        shift = Motion(np.zeros(len(phis)), e*np.cos(phis), e*np.sin(phis))
+        bufs = [np.empty(a.shape) for a in (disc, pins, holes, eccentric)]
+        for k, frame in enumerate(frames):
+            phi = phis[k]
+            x, y = shift.place(k, eccentric, bufs[3])
+            self.inner_pin.set_data([x], [y])
+            self.dot.set_data([(Rm+e)*np.cos(phi)+e*np.cos(phi)], [(Rm+e)*np.sin(phi)+e*np.sin(phi)])
+            set_ring(self.inner_pins, turn.place(k, pins, bufs[1]))
+            set_ring(self.inner_circles, motion.place(k, holes, bufs[2]))
+            x, y = motion.place(k, disc, bufs[0])
+            self.ehypocycloid.set_data([x], [y])
+            self.edot.set_data([x[0]], [y[0]])
+            yield frame
+
+    def pin_update(self, n, d, D):
+        set_ring(self.pins, profile_cache.pin_ring(n, d, D, self.t))
+
+    def inner_pin_update(self, n, N, rd, Rd, phi):
+        ring = profile_cache.pin_ring(n, 2*rd, 2*Rd, self.t)
+        set_ring(self.inner_pins, rotate(ring, -phi/(N-1)))
+
+    def drive_pin_update(self, r):
+        self.d0.set_data([r*self.basis.sin], [r*self.basis.cos])
+
+    def update_inner_circle(self, e, n, N, rd, Rd, phi):
+        ring = profile_cache.hole_ring(n, rd+e, Rd, self.t)
+        set_ring(self.inner_circles, rotate(ring, -phi/(N-1), e*np.cos(phi), e*np.sin(phi)))
+
+    def update_inner_pin(self, e, Rm, phi):
+        x = (Rm+e)*self.basis.cos+e*np.cos(phi)
+        y = (Rm+e)*self.basis.sin+e*np.sin(phi)
+        self.inner_pin.set_data([x], [y])
+        self.dot.set_data([(Rm+e)*np.cos(phi)+e*np.cos(phi)], [(Rm+e)*np.sin(phi)+e*np.sin(phi)])
+
+    def update_ehypocycloid(self, e, n, D, d, phi):
+        self.profile.update(e, n, D, d)
+        x, y = self.profile.place(-phi/(n-1), e*np.cos(phi), e*np.sin(phi))
+        self.ehypocycloid.set_data([x], [y])
+        self.edot.set_data([x[0]], [y[0]])
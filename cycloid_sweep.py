@@ -0,0 +1,187 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+from cycloid_analysis import undercut_margin
+
+## design space sweep over the drive parameters
+#
+# Every axis is a value, a comma list or an inclusive start:stop:step range
+# (by default the demo_UI_ver1.1 slider ranges at coarser steps). The grid is never built:
+# workers get flat index ranges, unravel them into parameter columns,
+# evaluate all metrics vectorized and write their own shard, so a sweep of
+# millions of tuples only ever holds one chunk per worker in memory.
+#
+#   python cycloid_sweep.py -o sweep/
+#   python cycloid_sweep.py --N 10:40:1 --e 0.1:5:0.1 --la 0.8:0.98:0.01 -o la_sweep/ -j 0
+#
+# Columns per tuple:
+#   ratio          reduction ratio N-1
+#   margin         undercut margin of the exact profile of (e, N, D, d), mm
+#                  (< 0 undercut). It does not depend on la: the la axis
+#                  only reshapes the envelope and the walls below
+#   r_max, r_min   disc envelope, lobe tip and root radius, mm
+#   hole_wall      wall between neighbouring inner pin holes (radius rd+e
+#                  on Rd, as drawn by update_inner_circle), mm
+#   rim_wall       hole to the disc root
+#   hub_wall       hole to the eccentric bore (radius Rm+e)
+#   min_wall       smallest of the three
+#   valid          margin > 0 and min_wall > 0
+#
+# An empty axis (e.g. a start:stop:step with stop < start) gives an empty
+# sweep: a manifest with size 0 and no shards.
+
+AXES = ['N', 'D', 'd', 'e', 'la', 'n', 'Rd', 'rd', 'Rm']
+DEFAULTS = {'N': '2:40:1', 'D': '20:150:10', 'd': '2:20:2', 'e': '0.5:10:0.5', 'la': None,
+            'n': '6', 'Rd': '20', 'rd': '5', 'Rm': '5'}
+
+
+def parse_axis(spec):
+    # '80', '60,80,100' or '5:150:5' (stop included)
+    if ':' in spec:
+        a, b, step = (float(v) for v in spec.split(':'))
+        if step <= 0:
+            raise ValueError('step must be > 0: ' + spec)
+        return np.round(a + step*np.arange(int(np.floor((b - a)/step + 1e-9)) + 1), 9)
+    return np.array([float(v) for v in spec.split(',')])
+
+
+def grid_chunks(size, chunk):
+    return [(a, min(a + chunk, size)) for a in range(0, size, chunk)]
+
+
+def grid_columns(axes, start, stop):
+    # parameter columns of the flat grid indices start..stop-1
+    names = list(axes)
+    idx = np.unravel_index(np.arange(start, stop), [len(axes[k]) for k in names])
+    return {k: axes[k][i] for k, i in zip(names, idx)}
+
+
+def envelope(e, N, D, d, la=None, samples=256):
+    # tip and root radius of the disc outline. Exact and lamuda profiles are
+    # both (R-w)*(cos t, sin t) - (E - w*L)*(cos kt, sin kt), whose radius
+    # only depends on u = cos((N-1)t), so one half lobe is sampled per tuple.
+    e, N, D, d = (np.asarray(v, float)[..., None] for v in (e, N, D, d))
+    R = D/2
+    rm = R/N
+    if la is None:
+        E, L = e, e/rm
+    else:
+        la = np.asarray(la, float)[..., None]
+        E, L = e*la, la
+    u = np.cos(np.linspace(0, np.pi, samples))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # nan at the cusp, e = rm on the exact profile
+        w = (d/2)/np.sqrt(1 + L**2 - 2*L*u)
+        a, b = R - w, E - w*L
+        r = np.sqrt(np.maximum(a**2 + b**2 - 2*a*b*u, 0))
+    return r.max(-1), r.min(-1)
+
+
+def drive_metrics(cols, samples=256):
+    N, D, d, e = cols['N'], cols['D'], cols['d'], cols['e']
+    n, Rd, rd, Rm = cols['n'], cols['Rd'], cols['rd'], cols['Rm']
+    r_max, r_min = envelope(e, N, D, d, cols.get('la'), samples)
+    hole = rd + e
+    hole_wall = 2*Rd*np.sin(np.pi/n) - 2*hole
+    rim_wall = r_min - (Rd + hole)
+    hub_wall = Rd - hole - (Rm + e)
+    min_wall = np.minimum(np.minimum(hole_wall, rim_wall), hub_wall)
+    margin = undercut_margin(e, N, D, d)  # exact profile, la left out on purpose
+    return {'ratio': N - 1, 'margin': margin, 'r_max': r_max, 'r_min': r_min,
+            'hole_wall': hole_wall, 'rim_wall': rim_wall, 'hub_wall': hub_wall,
+            'min_wall': min_wall, 'valid': (margin > 0) & (min_wall > 0)}
+
+
+def write_shard(path, cols, fmt):
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table(cols), path)
+    else:
+        np.savez(path, **cols)
+
+
+def _sweep_chunk(job):
+    # runs in a worker: one flat index range -> one shard on disk
+    axes, start, stop, path, fmt, samples = job
+    cols = grid_columns(axes, start, stop)
+    cols.update(drive_metrics(cols, samples))
+    write_shard(path, cols, fmt)
+    return {'file': os.path.basename(path), 'start': start, 'stop': stop,
+            'valid': int(cols['valid'].sum()), 'undercut': int((cols['margin'] < 0).sum())}
+
+
+def run_sweep(axes, folder, chunk=65536, jobs=0, fmt='npz', samples=256):
+    if fmt == 'parquet':
+        import pyarrow  # fail before any worker starts
+    os.makedirs(folder, exist_ok=True)
+    size = int(np.prod([len(v) for v in axes.values()]))
+    ext = '.parquet' if fmt == 'parquet' else '.npz'
+    work = [(axes, a, b, os.path.join(folder, f'shard_{i:05d}{ext}'), fmt, samples)
+            for i, (a, b) in enumerate(grid_chunks(size, chunk))]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(work) < 2:
+        shards = [_sweep_chunk(job) for job in work]
+    else:
+        with multiprocessing.Pool(min(jobs, len(work))) as pool:
+            shards = list(pool.imap(_sweep_chunk, work))
+    manifest = {'size': size, 'format': fmt, 'axes': {k: v.tolist() for k, v in axes.items()},
+                'shards': shards}
+    with open(os.path.join(folder, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def iter_sweep(folder, columns=None):
+    # shard by shard, for sweeps that do not fit in memory
+    with open(os.path.join(folder, 'manifest.json')) as f:
+        manifest = json.load(f)
+    for shard in manifest['shards']:
+        path = os.path.join(folder, shard['file'])
+        if manifest['format'] == 'parquet':
+            import pyarrow.parquet as pq
+            table = pq.read_table(path, columns=columns)
+            yield {k: table[k].to_numpy() for k in table.column_names}
+        else:
+            with np.load(path) as data:
+                yield {k: data[k] for k in (columns or data.files)}
+
+
+def load_sweep(folder, columns=None):
+    shards = list(iter_sweep(folder, columns))
+    if not shards:
+        return {}
+    return {k: np.concatenate([s[k] for s in shards]) for k in shards[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='sweep the drive parameters and store per tuple metrics')
+    for k in AXES:
+        parser.add_argument('--' + k, default=DEFAULTS[k],
+                            help='value, a,b,c or start:stop:step' +
+                            (' (default exact profile; margin ignores it)' if k == 'la' else ''))
+    parser.add_argument('-o', '--output', default='sweep', help='folder for the shards and manifest.json')
+    parser.add_argument('--format', choices=['npz', 'parquet'], default='npz')
+    parser.add_argument('--chunk', type=int, default=65536, help='tuples per shard')
+    parser.add_argument('--samples', type=int, default=256, help='samples per half lobe for the envelope')
+    parser.add_argument('-j', '--jobs', type=int, default=0, help='worker processes (0: one per cpu)')
+    args = parser.parse_args(argv)
+    try:
+        axes = {k: parse_axis(getattr(args, k)) for k in AXES if getattr(args, k) is not None}
+        start = time.perf_counter()
+        manifest = run_sweep(axes, args.output, args.chunk, args.jobs, args.format, args.samples)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+    size = manifest['size']
+    valid = sum(s['valid'] for s in manifest['shards'])
+    undercut = sum(s['undercut'] for s in manifest['shards'])
+    print(f"{size} tuples in {len(manifest['shards'])} shards, {time.perf_counter() - start:.2f} s")
+    print(f"valid {valid}, undercut {undercut}")
+    print('saved', args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import json
+import os
+import sys
+import time
+from collections import deque
+import numpy as np
+
+## per-frame timing of the demo update functions and the canvas draw
+#
+# Disabled (the default) every method hands back what it was given, so
+# instrumented demos run the exact same code as before. Enabled with
+# FrameTimer(True) or CYCLOID_PROFILE=1 in the environment:
+#
+#   timer = FrameTimer(profile_frames)
+#   timer.instrument(globals())          # update_* and *_update functions
+#   timer.attach(fig)                    # full draws, blits, draw_artist
+#   moving += timer.overlay(ax)          # fps and ms per stage on the canvas
+#   ani = BlitAnimation(fig, timer.frame(animate), ...)
+#   timer.dump('frame_trace.json')       # chrome://tracing / Perfetto
+
+
+class FrameTimer:
+
+    def __init__(self, enabled=None, history=300, trace=100000, every=10):
+        if enabled is None:
+            enabled = os.environ.get('CYCLOID_PROFILE', '') not in ('', '0')
+        self.enabled = bool(enabled)
+        self.history = history
+        self.every = every
+        self.stages = {}
+        self.events = deque(maxlen=trace)
+        self.ticks = deque(maxlen=history)
+        self.frames = 0
+        self.text = None
+        self._start = time.perf_counter()
+
+    def _record(self, name, t0, t1):
+        try:
+            self.stages[name].append(t1 - t0)
+        except KeyError:
+            self.stages[name] = deque([t1 - t0], maxlen=self.history)
+        self.events.append((name, t0, t1))
+
+    def wrap(self, func, name=None):
+        if not self.enabled:
+            return func
+        name = name or func.__name__
+        clock = time.perf_counter
+        record = self._record
+
+        def timed(*args, **kwargs):
+            t0 = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, t0, clock())
+        timed.__wrapped__ = func
+        return timed
+
+    def instrument(self, ns, names=None):
+        # replace the named functions of a demo's globals by timed ones;
+        # animate() looks them up at call time so it picks them up
+        if not self.enabled:
+            return []
+        if names is None:
+            names = [k for k, v in ns.items() if callable(v) and getattr(v, '__module__', None) == ns.get('__name__')
+                     and (k.startswith('update_') or k.endswith('_update'))]
+        for k in names:
+            ns[k] = self.wrap(ns[k], k)
+        return names
+
+    def attach(self, fig):
+        if not self.enabled:
+            return
+        canvas = fig.canvas
+        canvas.draw = self.wrap(canvas.draw, 'draw')
+        canvas.blit = self.wrap(canvas.blit, 'blit')
+        for ax in fig.axes:
+            ax.draw_artist = self.wrap(ax.draw_artist, 'draw_artist')
+
+    def overlay(self, ax):
+        # text artist to add to the blitted artists, [] when disabled
+        if not self.enabled:
+            return []
+        self.text = ax.text(0.01, 0.99, '', transform=ax.transAxes, va='top', ha='left',
+                            family='monospace', fontsize=7, color='0.3')
+        return [self.text]
+
+    def frame(self, animate):
+        # whole tick; refreshes the overlay every few frames
+        if not self.enabled:
+            return animate
+        timed = self.wrap(animate, 'frame')
+
+        def tick(frame):
+            self.ticks.append(time.perf_counter())
+            self.frames += 1
+            if self.text is not None and self.frames % self.every == 0:
+                self.text.set_text(self.summary())
+            return timed(frame)
+        return tick
+
+    def fps(self):
+        if len(self.ticks) < 2:
+            return 0.0
+        return (len(self.ticks) - 1)/(self.ticks[-1] - self.ticks[0])
+
+    def stats(self):
+        # ms per call over the rolling window, per stage
+        out = {}
+        for name, d in self.stages.items():
+            ms = 1e3*np.array(d)
+            out[name] = {'calls': len(ms), 'mean': float(ms.mean()), 'p50': float(np.percentile(ms, 50)),
+                         'p95': float(np.percentile(ms, 95)), 'max': float(ms.max())}
+        return out
+
+    def histogram(self, name, bins=20):
+        # (counts, edges in ms) of one stage's rolling window
+        return np.histogram(1e3*np.array(self.stages[name]), bins=bins)
+
+    def summary(self):
+        lines = [f'{self.fps():5.1f} fps']
+        stats = sorted(self.stats().items(), key=lambda kv: -kv[1]['mean'])
+        lines += [f'{name[:22]:22s} {s["mean"]:6.2f} ms' for name, s in stats]
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        # chrome trace event format, one complete event per timed call
+        pid = os.getpid()
+        events = [{'name': name, 'ph': 'X', 'pid': pid, 'tid': 0,
+                   'ts': 1e6*(t0 - self._start), 'dur': 1e6*(t1 - t0)} for name, t0, t1 in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+## startup breakdown of a demo, from the first line to the first paint
+#
+#   start = time.perf_counter()             # first line of the script
+#   ...imports...
+#   startup = StartupTimer(start=start)
+#   startup.mark('imports')
+#   ...
+#   startup.paint(fig, 'first paint')       # marked at the next draw_event
+#   startup.paint(fig, 'controls painted', report=True)
+#
+# Marks are always taken (one perf_counter each); the report is printed
+# to stderr only when enabled, StartupTimer(True) or CYCLOID_STARTUP=1.
+
+
+class StartupTimer:
+
+    def __init__(self, enabled=None, start=None):
+        if enabled is None:
+            enabled = os.environ.get('CYCLOID_STARTUP', '') not in ('', '0')
+        self.enabled = bool(enabled)
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.stages = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.stages.append((name, now - self.last))
+        self.last = now
+
+    def paint(self, fig, name, report=False):
+        # mark name when fig is next drawn, i.e. when it is on screen
+        canvas = fig.canvas
+
+        def on_draw(event):
+            canvas.mpl_disconnect(cid)
+            self.mark(name)
+            if report:
+                self.report()
+        cid = canvas.mpl_connect('draw_event', on_draw)
+
+    def total(self):
+        return self.last - self.start
+
+    def summary(self):
+        lines = [f'{name:24s} {1e3*dt:8.1f} ms' for name, dt in self.stages]
+        lines.append(f'{"total":24s} {1e3*self.total():8.1f} ms')
+        return '\n'.join(lines)
+
+    def report(self, file=None):
+        if self.enabled:
+            print('startup:\n' + self.summary(), file=file or sys.stderr)
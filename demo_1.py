@@ -2,8 +2,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Slider, Button
+from cycloid_geometry import CycloidProfile, profile_cache, rotate, trig_basis
+from cycloid_graph import DependencyGraph
+from cycloid_render import BlitAnimation, ring_collection, set_ring
+from cycloid_timing import FrameTimer
 
 interval = 50 # ms, time between animation frames
+blit = True # redraw only the moving parts, fixed pins stay in the background
+profile_frames = False # per-stage timing overlay, frame_trace.json on close (also CYCLOID_PROFILE=1)
 
 fig, ax = plt.subplots(figsize=(6,6))
 plt.subplots_adjust(left=0.15, bottom=0.35)
@@ -13,60 +19,35 @@ plt.xlim(-1.2*40,1.2*40)
 plt.ylim(-1.2*40,1.2*40)
 #plt.grid()
 t = np.linspace(0, 2*np.pi, 4000)
+basis = trig_basis(t)
 delta = 1
 
 ## draw pin
-num_pins = 61
-pins = [ax.plot([], [], 'k-')[0] for n in range(num_pins)]
-def draw_pin_init():
-    for p in pins:
-        p.set_data([0], [0])
-
-def pin_update(n,d,D):
-    for i in range(int(n)):    
-        x = (d/2*np.sin(t)+ D/2*np.cos(2*i*np.pi/n))
-        y = (d/2*np.cos(t) + D/2*np.sin(2*i*np.pi/n))
-        pins[i].set_data(x,y)
+pins = ring_collection(ax, 'k')
+def pin_update(ring):
+    set_ring(pins, ring)
 
 ## draw inner_pin
-num_inner_pins = 10
-inner_pins = [ax.plot([], [], 'g-')[0] for n in range(num_inner_pins)]
-def draw_inner_pin_init():
-    for p in inner_pins:
-        p.set_data([0], [0])
-
-def inner_pin_update(n,N,rd,Rd,phi):
-    for i in range(int(n)):    
-        x = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)) - (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1))
-        y = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)) + (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1))
-        inner_pins[i].set_data(x,y)
+inner_pins = ring_collection(ax, 'g')
+def inner_pin_update(ring,N,phi):
+    set_ring(inner_pins, rotate(ring, -phi/(N-1)))
 
 ## draw drive_pin
 d0, = ax.plot([0],[0],'k-')
-def drive_pin_update(r):
-    x = r*np.sin(t)
-    y = r*np.cos(t)
-    d0.set_data([x], [y])
+def drive_pin_update(circle):
+    d0.set_data([circle[0]], [circle[1]])
 
 #inner circle:
-num_inner_circles = 10
-inner_circles = [ax.plot([], [], 'r-')[0] for n in range(num_inner_circles)]
-def draw_inner_circle_init():
-    for p in inner_circles:
-        p.set_data([0], [0])
-
-def update_inner_circle(e,n,N,rd,Rd, phi):
-    for i in range(int(n)):
-        x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)) + e*np.cos(phi)
-        y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)) + e*np.sin(phi)
-        inner_circles[i].set_data(x,y)
+inner_circles = ring_collection(ax, 'r')
+def update_inner_circle(ring,e,N, phi):
+    set_ring(inner_circles, rotate(ring, -phi/(N-1), e*np.cos(phi), e*np.sin(phi)))
  
 ##inner pin:
 inner_pin, = ax.plot([0],[0],'r-')
 dot, = ax.plot([0],[0], 'ro', ms=5)
-def update_inner_pin(e,Rm, phi):
-    x = (Rm+e)*np.cos(t)+e*np.cos(phi)
-    y = (Rm+e)*np.sin(t)+e*np.sin(phi)
+def update_inner_pin(circle,e,Rm, phi):
+    x = circle[0]+e*np.cos(phi)
+    y = circle[1]+e*np.sin(phi)
     inner_pin.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi)+e*np.cos(phi)
@@ -76,19 +57,9 @@ def update_inner_pin(e,Rm, phi):
 ##ehypocycloid:
 ehypocycloid, = ax.plot([0],[0],'r-')
 edot, = ax.plot([0],[0], 'ro', ms=5)
-def update_ehypocycloid(e,n,D,d, phis):
-    RD=D/2
-    rd=d/2
-    rc = (n-1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)-e*np.cos((rc+rm)/rm*t)
-    ya = (rc+rm)*np.sin(t)-e*np.sin((rc+rm)/rm*t)
-
-    dxa = (rc+rm)*(-np.sin(t)+(e/rm)*np.sin((rc+rm)/rm*t))
-    dya = (rc+rm)*(np.cos(t)-(e/rm)*np.cos((rc+rm)/rm*t))
-
-    x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1))  + e*np.cos(phis)
-    y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1))  + e*np.sin(phis)
+profile = CycloidProfile(t)
+def update_ehypocycloid(base,e,n, phis):
+    x, y = rotate(base, -phis/(n-1), e*np.cos(phis), e*np.sin(phis), out=profile.frame)
     ehypocycloid.set_data([x], [y])
     edot.set_data([x[0]], [y[0]])
 
@@ -114,28 +85,37 @@ sli_N = Slider(ax_N, 'N', 3, 40, valinit=10, valstep=delta)
 sli_d = Slider(ax_d, 'd', 2, 20, valinit=10,valstep=delta)
 sli_D = Slider(ax_D, 'D', 5, 200, valinit=80,valstep=delta)
 
-def update(val):
-    sfm = sli_Rm.val
-    sRm = sli_Rm.val
-    sRd = sli_Rd.val
-    sn = sli_n.val
-    srd = sli_rd.val    
-    se = sli_e.val
-    sN = sli_N.val
-    sd = sli_d.val
-    sD = sli_D.val
-    ax.set_xlim(-1.2*0.5*sD,1.2*0.5*sD)
-    ax.set_ylim(-1.2*0.5*sD,1.2*0.5*sD)
-
-sli_fm.on_changed(update)
-sli_Rm.on_changed(update)
-sli_Rd.on_changed(update)
-sli_n.on_changed(update)
-sli_rd.on_changed(update)
-sli_e.on_changed(update)
-sli_N.on_changed(update)
-sli_d.on_changed(update)
-sli_D.on_changed(update)
+sliders = {'fm': sli_fm, 'Rm': sli_Rm, 'n': sli_n, 'Rd': sli_Rd, 'rd': sli_rd,
+           'e': sli_e, 'N': sli_N, 'd': sli_d, 'D': sli_D}
+
+## geometry per slider: a slider change only rebuilds the nodes below it
+graph = DependencyGraph(**{name: sli.val for name, sli in sliders.items()})
+graph.node('view', ['D'], lambda D: (-1.2*0.5*D, 1.2*0.5*D))
+graph.node('pins', ['N','d','D'], lambda N,d,D: profile_cache.pin_ring(N,d,D,t))
+graph.node('drive', ['Rm'], lambda Rm: Rm*np.array([basis.sin, basis.cos]))
+graph.node('inner_pins', ['n','rd','Rd'], lambda n,rd,Rd: profile_cache.pin_ring(n,2*rd,2*Rd,t))
+graph.node('holes', ['n','rd','Rd','e'], lambda n,rd,Rd,e: profile_cache.hole_ring(n,rd+e,Rd,t))
+graph.node('eccentric', ['Rm','e'], lambda Rm,e: (Rm+e)*np.array([basis.cos, basis.sin]))
+graph.node('disc', ['e','N','D','d'], profile.update)
+static_nodes = {'view', 'pins', 'drive'}
+
+def update(name, val):
+    # moving bodies pick up their dirty nodes on the next frame, the
+    # background is only redrawn when static geometry changed
+    dirty = graph.set(name, val)
+    if dirty & static_nodes:
+        update_static()
+        if blit:
+            ani.invalidate()
+
+def update_static():
+    ax.set_xlim(*graph['view'])
+    ax.set_ylim(*graph['view'])
+    pin_update(graph['pins'])
+    drive_pin_update(graph['drive'])
+
+for name, sli in sliders.items():
+    sli.on_changed(lambda val, name=name: update(name, val))
 
 resetax = plt.axes([0.8, 0.0, 0.1, 0.04])
 button = Button(resetax, 'Reset', color=axcolor, hovercolor='0.975')
@@ -154,31 +134,35 @@ def reset(event):
 button.on_clicked(reset)
 
 def animate(frame):
-    sfm = sli_fm.val
-    sRm = sli_Rm.val
-    sRd = sli_Rd.val
-    sn = sli_n.val
-    srd = sli_rd.val    
-    se = sli_e.val
-    sN = sli_N.val
-    sd = sli_d.val
-    sD = sli_D.val
+    v = graph.values
+    se = v['e']
+    sN = v['N']
     frame = frame+1
-    phi = 2*np.pi*frame/sfm
+    phi = 2*np.pi*frame/v['fm']
 
 
-    draw_pin_init()
-    draw_inner_pin_init()
-    draw_inner_circle_init()
-    pin_update(sN,sd,sD)
-    update_inner_pin(se,sRm, phi)
-    inner_pin_update(sn,sN,srd,sRd,phi)
-    drive_pin_update(sRm)
-    update_inner_circle(se,sn,sN,srd,sRd, phi)
-    update_ehypocycloid(se,sN,sD,sd, phi)
+    if not blit:
+        update_static()
+    update_inner_pin(graph['eccentric'],se,v['Rm'], phi)
+    inner_pin_update(graph['inner_pins'],sN,phi)
+    update_inner_circle(graph['holes'],se,sN, phi)
+    update_ehypocycloid(graph['disc'],se,sN, phi)
 
+    if blit:
+        return moving
     fig.canvas.draw_idle()
 
-ani = animation.FuncAnimation(fig, animate,frames=sli_fm.val*(sli_N.val-1), interval=interval)
+moving = [inner_pins, inner_circles, inner_pin, dot, ehypocycloid, edot]
+timer = FrameTimer(profile_frames or None)
+timer.instrument(globals())
+timer.attach(fig)
+moving += timer.overlay(ax)
+if timer.enabled:
+    fig.canvas.mpl_connect('close_event', lambda event: print('saved', timer.dump('frame_trace.json')))
+update_static()
+if blit:
+    ani = BlitAnimation(fig, timer.frame(animate), sli_fm.val*(sli_N.val-1), interval, moving)
+else:
+    ani = animation.FuncAnimation(fig, timer.frame(animate),frames=sli_fm.val*(sli_N.val-1), interval=interval)
 dpi=100
 plt.show()
@@ -2,6 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Slider, Button
+from cycloid_geometry import trig_basis
 
 interval = 50 # ms, time between animation frames
 
@@ -14,6 +15,7 @@ plt.xlim(-1.4*40,1.4*40)
 plt.ylim(-1.4*40,1.4*40)
 #plt.grid()
 t = np.linspace(0, 2*np.pi, 10000)
+basis = trig_basis(t)
 delta = 1
 
 
@@ -25,8 +27,8 @@ def draw_pinA_init():
         p.set_data([0], [0])
 def pinA_update(e,n,n1,d,D, phis):
     for i in range(int(n)):    
-        xd = (d/2*np.cos(t)+ D/2*np.cos(2*i*np.pi/n)) + e*np.cos(phis)
-        yd = (d/2*np.sin(t)+ D/2*np.sin(2*i*np.pi/n)) + e*np.sin(phis)
+        xd = (d/2*basis.cos+ D/2*np.cos(2*i*np.pi/n)) + e*np.cos(phis)
+        yd = (d/2*basis.sin+ D/2*np.sin(2*i*np.pi/n)) + e*np.sin(phis)
         x = xd*np.cos(-phis/(n1+1)) - yd*np.sin(-phis/(n1+1)) 
         y = xd*np.sin(-phis/(n1+1)) + yd*np.cos(-phis/(n1+1)) 
         pinsA[i].set_data(x,y)
@@ -39,8 +41,8 @@ def draw_pinB_init():
         p.set_data([0], [0])
 def pinB_update(e,n,d,D, phis):
     for i in range(int(n)):    
-        xd = (d/2*np.cos(t)+ D/2*np.cos(2*i*np.pi/n)) + e*np.cos(phis)
-        yd = (d/2*np.sin(t)+ D/2*np.sin(2*i*np.pi/n)) + e*np.sin(phis)
+        xd = (d/2*basis.cos+ D/2*np.cos(2*i*np.pi/n)) + e*np.cos(phis)
+        yd = (d/2*basis.sin+ D/2*np.sin(2*i*np.pi/n)) + e*np.sin(phis)
         x = xd*np.cos(-phis/(n+1)) - yd*np.sin(-phis/(n+1)) 
         y = xd*np.sin(-phis/(n+1)) + yd*np.cos(-phis/(n+1)) 
         pinsB[i].set_data(x,y)
@@ -49,8 +51,8 @@ def pinB_update(e,n,d,D, phis):
 d0, = ax.plot([0],[0],'r-', lw=2)
 
 def drive_pin_update(r):
-    x = r*np.sin(t)
-    y = r*np.cos(t)
+    x = r*basis.sin
+    y = r*basis.cos
     d0.set_data([x], [y])
 
 
@@ -59,8 +61,8 @@ inner_pin, = ax.plot([0],[0],'g-')
 dot, = ax.plot([0],[0], 'go', ms=5)
 
 def update_inner_pin(e,n,Rm, phi):
-    x = (Rm+e)*np.cos(t)+e*np.cos(phi-phi/(n+1))
-    y = (Rm+e)*np.sin(t)+e*np.sin(phi-phi/(n+1))
+    x = (Rm+e)*basis.cos+e*np.cos(phi-phi/(n+1))
+    y = (Rm+e)*basis.sin+e*np.sin(phi-phi/(n+1))
     inner_pin.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi-phi/(n+1))+e*np.cos(phi-phi/(n+1))
@@ -77,12 +79,13 @@ def update_hypocycloidA(e,n,n1,D,d, phis):
     rd=d/2
     rc = (n-1)*(RD/n)
     rm = (RD/n)
+    ck, sk = basis.harmonic((rc+rm)/rm)
 
-    xa = (rc+rm)*np.cos(t)-e*np.cos((rc+rm)/rm*t)
-    ya = (rc+rm)*np.sin(t)-e*np.sin((rc+rm)/rm*t)
+    xa = (rc+rm)*basis.cos-e*ck
+    ya = (rc+rm)*basis.sin-e*sk
 
-    dxa = (rc+rm)*(-np.sin(t)+(e/rm)*np.sin((rc+rm)/rm*t))
-    dya = (rc+rm)*(np.cos(t)-(e/rm)*np.cos((rc+rm)/rm*t))
+    dxa = (rc+rm)*(-basis.sin+(e/rm)*sk)
+    dya = (rc+rm)*(basis.cos-(e/rm)*ck)
 
     x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1) -phis/(n1+1) - np.pi/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1) -phis/(n1+1) - np.pi/(n-1))  
     y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1) -phis/(n1+1) - np.pi/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1) -phis/(n1+1)- np.pi/(n-1)) 
@@ -103,12 +106,13 @@ def update_hypocycloidC(e,n,n1,D,d, phis):
     rd=d/2
     rc = (n)*(RD/n)
     rm = (RD/n)
+    ck, sk = basis.harmonic((rc+rm)/rm)
 
-    xa = (rc+rm)*np.cos(t)-e*np.cos((rc+rm)/rm*t)
-    ya = (rc+rm)*np.sin(t)-e*np.sin((rc+rm)/rm*t)
+    xa = (rc+rm)*basis.cos-e*ck
+    ya = (rc+rm)*basis.sin-e*sk
 
-    dxa = (rc+rm)*(-np.sin(t)+(e/rm)*np.sin((rc+rm)/rm*t))
-    dya = (rc+rm)*(np.cos(t)-(e/rm)*np.cos((rc+rm)/rm*t))
+    dxa = (rc+rm)*(-basis.sin+(e/rm)*sk)
+    dya = (rc+rm)*(basis.cos-(e/rm)*ck)
 
     xd = xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya)  + e*np.cos(phis)
     yd = ya + rd/np.sqrt(dxa**2 + dya**2)*dxa + e*np.sin(phis)
@@ -128,12 +132,13 @@ def update_hypocycloidB(e,n,D,d, phis):
     rd=d/2
     rc = (n+1)*(RD/n)
     rm = (RD/n)
+    ck, sk = basis.harmonic((rc-rm)/rm)
 
-    xa = (rc-rm)*np.cos(t)+e*np.cos((rc-rm)/rm*t)
-    ya = (rc-rm)*np.sin(t)-e*np.sin((rc-rm)/rm*t)
+    xa = (rc-rm)*basis.cos+e*ck
+    ya = (rc-rm)*basis.sin-e*sk
 
-    dxa = (rc-rm)*(-np.sin(t)-(e/rm)*np.sin((rc-rm)/rm*t))
-    dya = (rc-rm)*(np.cos(t)-(e/rm)*np.cos((rc-rm)/rm*t))
+    dxa = (rc-rm)*(-basis.sin-(e/rm)*sk)
+    dya = (rc-rm)*(basis.cos-(e/rm)*ck)
 
     x = xa - rd/np.sqrt(dxa**2 + dya**2)*(-dya)
     y = ya - rd/np.sqrt(dxa**2 + dya**2)*dxa
@@ -151,12 +156,13 @@ def update_hypocycloidD(e,n,D,d, phis):
     rd=d/2
     rc = (n)*(RD/n)
     rm = (RD/n)
+    ck, sk = basis.harmonic((rc-rm)/rm)
 
-    xa = (rc-rm)*np.cos(t)+e*np.cos((rc-rm)/rm*t)
-    ya = (rc-rm)*np.sin(t)-e*np.sin((rc-rm)/rm*t)
+    xa = (rc-rm)*basis.cos+e*ck
+    ya = (rc-rm)*basis.sin-e*sk
 
-    dxa = (rc-rm)*(-np.sin(t)-(e/rm)*np.sin((rc-rm)/rm*t))
-    dya = (rc-rm)*(np.cos(t)-(e/rm)*np.cos((rc-rm)/rm*t))
+    dxa = (rc-rm)*(-basis.sin-(e/rm)*sk)
+    dya = (rc-rm)*(basis.cos-(e/rm)*ck)
 
     xd = xa - rd/np.sqrt(dxa**2 + dya**2)*(-dya) + e*np.cos(phis)
     yd = ya - rd/np.sqrt(dxa**2 + dya**2)*dxa + e*np.sin(phis)
@@ -2,6 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Slider, Button
+from cycloid_geometry import disc_frame, profile_cache, rotate, trig_basis
 
 interval = 50 # ms, time between animation frames
 
@@ -13,6 +14,7 @@ plt.xlim(-1.2*40,1.2*40)
 plt.ylim(-1.2*40,1.2*40)
 #plt.grid()
 t = np.linspace(0, 2*np.pi, 10000)
+basis = trig_basis(t)
 delta = 1
 
 
@@ -26,8 +28,8 @@ def draw_pin_init():
 
 def pin_update(n,d,D):
     for i in range(int(n)):    
-        x = (d/2*np.sin(t)+ D/2*np.cos(2*i*np.pi/n))
-        y = (d/2*np.cos(t) + D/2*np.sin(2*i*np.pi/n))
+        x = (d/2*basis.sin+ D/2*np.cos(2*i*np.pi/n))
+        y = (d/2*basis.cos + D/2*np.sin(2*i*np.pi/n))
         pins[i].set_data(x,y)
 
 
@@ -40,18 +42,17 @@ def draw_inner_pin_init():
         p.set_data([0], [0])
 
 def inner_pin_update(n,N,rd,Rd,phi):
+    ring = rotate(profile_cache.pin_ring(n,2*rd,2*Rd,t), -phi/(N-1))
     for i in range(int(n)):    
-        x = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)) - (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1))
-        y = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)) + (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1))
-        inner_pins[i].set_data(x,y)
+        inner_pins[i].set_data(ring[i,0],ring[i,1])
 
 
 ## draw drive_pin
 d0, = ax.plot([0],[0],'k-')
 
 def drive_pin_update(r):
-    x = r*np.sin(t)
-    y = r*np.cos(t)
+    x = r*basis.sin
+    y = r*basis.cos
     d0.set_data([x], [y])
 
 
@@ -64,10 +65,9 @@ def draw_inner_circle_init():
         p.set_data([0], [0])
 
 def update_inner_circle(e,n,N,rd,Rd, phi):
+    ring = disc_frame(profile_cache.hole_ring(n,rd+e,Rd,t), e, N, phi)
     for i in range(int(n)):
-        x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)) + e*np.cos(phi)
-        y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)) + e*np.sin(phi)
-        inner_circles[i].set_data(x,y)
+        inner_circles[i].set_data(ring[i,0],ring[i,1])
  
 
 ##inner pin:
@@ -75,8 +75,8 @@ inner_pin, = ax.plot([0],[0],'r-')
 dot, = ax.plot([0],[0], 'ro', ms=5)
 
 def update_inner_pin(e,Rm, phi):
-    x = (Rm+e)*np.cos(t)+e*np.cos(phi)
-    y = (Rm+e)*np.sin(t)+e*np.sin(phi)
+    x = (Rm+e)*basis.cos+e*np.cos(phi)
+    y = (Rm+e)*basis.sin+e*np.sin(phi)
     inner_pin.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi)+e*np.cos(phi)
@@ -89,15 +89,9 @@ hypocycloid, = ax.plot([0],[0],'r-')
 edot, = ax.plot([0],[0], 'ro', ms=5)
 
 def update_hypocycloid(lamuda,e,n,D,d, phis):
-    RD=D/2
-    rd=d/2
-    rc = (n-1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)-e*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-    ya = (rc+rm)*np.sin(t)-e*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
-    x = (xa )*np.cos(-phis/(n-1))-(ya )*np.sin(-phis/(n-1))  + e*np.cos(phis)
-    y = (xa )*np.sin(-phis/(n-1))+(ya )*np.cos(-phis/(n-1))  + e*np.sin(phis)
+    # outline only changes with the sliders, each frame just moves it
+    base = profile_cache.profile(e,n,D,d,t,lamuda=lamuda,family='short_width')
+    x, y = disc_frame(base, e, n, phis)
     hypocycloid.set_data([x], [y])
     edot.set_data([x[0]], [y[0]])
 
@@ -2,6 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Slider, Button
+from cycloid_geometry import profile_cache, rotate
 
 interval = 50 # ms, time between animation frames
 
@@ -71,16 +72,8 @@ hypocycloidA, = ax.plot([0],[0],'r-')
 edotA, = ax.plot([0],[0], 'ro', ms=5)
 
 def update_hypocycloidA(lamuda,e,n,D,d, phis):
-    #lamuda = 0.9
-    RD=D/2
-    rd=d/2
-    rc = (n-1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-    ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
-    x = (xa )*np.cos(-phis/(n-1))-(ya )*np.sin(-phis/(n-1))  + e*np.cos(phis)
-    y = (xa )*np.sin(-phis/(n-1))+(ya )*np.cos(-phis/(n-1))  + e*np.sin(phis)
+    base = profile_cache.profile(e,n,D,d,t,lamuda=lamuda,family='lamuda')
+    x, y = rotate(base, -phis/(n-1), e*np.cos(phis), e*np.sin(phis))
     hypocycloidA.set_data([x], [y])
     edotA.set_data([x[0]], [y[0]])
 
@@ -89,14 +82,8 @@ def update_hypocycloidA(lamuda,e,n,D,d, phis):
 hypocycloidC, = ax.plot([0],[0],'b-')
 
 def update_hypocycloidC(lamuda,e,n,D,d, phis):
-    #lamuda = 0.9
-    RD=D/2
-    rd=d/2
-    rc = (n)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-    ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
+    # pins on rc = n*rm with the same rm = D/(2n): n+1 lobes on a (n+1)/n larger D
+    xa, ya = profile_cache.profile(e,n+1,D*(n+1)/n,d,t,lamuda=lamuda,family='lamuda')
     hypocycloidC.set_data([xa], [ya])
 
 
@@ -105,16 +92,8 @@ hypocycloidB, = ax.plot([0],[0],'b-')
 edotB, = ax.plot([0],[0], 'bo', ms=5)
 
 def update_hypocycloidB(lamuda,e,n,D,d, phis):
-    #lamuda = 0.9
-    RD=D/2
-    rd=d/2
-    rc = (n+1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc-rm)*np.cos(t)+e*lamuda*np.cos((rc-rm)/rm*t)+rd*(np.cos(t) - lamuda*np.cos((rc-rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-    ya = (rc-rm)*np.sin(t)-e*lamuda*np.sin((rc-rm)/rm*t)+rd*(np.sin(t) + lamuda*np.sin((rc-rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
-    x = (xa )*np.cos(phis/(n+1))-(ya )*np.sin(phis/(n+1))  - e*np.cos(phis)
-    y = (xa )*np.sin(phis/(n+1))+(ya )*np.cos(phis/(n+1))  - e*np.sin(phis)
+    base = profile_cache.profile(e,n,D,d,t,lamuda=lamuda,family='lamuda_hypo')
+    x, y = rotate(base, phis/(n+1), -e*np.cos(phis), -e*np.sin(phis))
     hypocycloidB.set_data([x], [y])
     edotB.set_data([x[0]], [y[0]])
 
@@ -123,14 +102,8 @@ def update_hypocycloidB(lamuda,e,n,D,d, phis):
 hypocycloidD, = ax.plot([0],[0],'r-')
 
 def update_hypocycloidD(lamuda,e,n,D,d, phis):
-    #lamuda = 0.9
-    RD=D/2
-    rd=d/2
-    rc = (n)*(RD/n)
-    rm = (RD/n)
-    xa = (rc-rm)*np.cos(t)+e*lamuda*np.cos((rc-rm)/rm*t)+rd*(np.cos(t) - lamuda*np.cos((rc-rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-    ya = (rc-rm)*np.sin(t)-e*lamuda*np.sin((rc-rm)/rm*t)+rd*(np.sin(t) + lamuda*np.sin((rc-rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
+    # pins on rc = n*rm with the same rm = D/(2n)
+    xa, ya = profile_cache.profile(e,n-1,D*(n-1)/n,d,t,lamuda=lamuda,family='lamuda_hypo')
     hypocycloidD.set_data([xa], [ya])
 
 
@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Slider, Button
+from cycloid_geometry import profile_cache, rotate
+from cycloid_render import LevelOfDetail
 
 interval = 50 # ms, time between animation frames
 
@@ -14,6 +16,7 @@ plt.ylim(-1.4*40,1.4*40)
 #plt.grid()
 t = np.linspace(0, 2*np.pi, 4096*2)
 delta = 1
+lod = LevelOfDetail(t, coarse=512, idle=0.5) # 512 samples while dragging, full t once idle
 
 
 ##inner pinD:
@@ -40,16 +43,8 @@ hypocycloidA, = ax.plot([0],[0],'b-')
 edotA, = ax.plot([0],[0], 'bo', ms=5)
 
 def update_hypocycloidA(lamuda,e,n,D,d, phis):
-    #lamuda = 0.9
-    RD=D/2
-    rd=d/2
-    rc = (n-1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-    ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
-    x = (xa )*np.cos(-phis/(n-1) + np.pi/(n-1))-(ya )*np.sin(-phis/(n-1) + np.pi/(n-1))  - e*np.cos(phis)
-    y = (xa )*np.sin(-phis/(n-1) + np.pi/(n-1))+(ya )*np.cos(-phis/(n-1) + np.pi/(n-1))  - e*np.sin(phis)
+    base = profile_cache.profile(e,n,D,d,t,lamuda=lamuda,family='lamuda')
+    x, y = rotate(base, -phis/(n-1) + np.pi/(n-1), -e*np.cos(phis), -e*np.sin(phis))
     hypocycloidA.set_data([x], [y])
     edotA.set_data([x[0]], [y[0]])
 
@@ -57,13 +52,8 @@ def update_hypocycloidA(lamuda,e,n,D,d, phis):
 hypocycloidC, = ax.plot([0],[0],'g-')
 
 def update_hypocycloidC(lamuda,e,n,D,d, phis):
-    #lamuda = 0.9
-    RD=D/2
-    rd=d/2
-    rc = (n)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-    ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
+    # pins on rc = n*rm with the same rm = D/(2n): n+1 lobes on a (n+1)/n larger D
+    xa, ya = profile_cache.profile(e,n+1,D*(n+1)/n,d,t,lamuda=lamuda,family='lamuda')
     hypocycloidC.set_data([xa], [ya])
 
 
@@ -94,6 +84,7 @@ def update(val):
     sD = sli_D.val
     ax.set_xlim(-1.4*0.5*sD,1.4*0.5*sD)
     ax.set_ylim(-1.4*0.5*sD,1.4*0.5*sD)
+    lod.touch()
 
 
 sli_la.on_changed(update)
@@ -119,6 +110,8 @@ def reset(event):
 button.on_clicked(reset)
 
 def animate(frame):
+    global t
+    t = lod.t()
     sla = sli_la.val
     sfm = sli_fm.val
     sRm = sli_Rm.val
@@ -2,6 +2,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Slider, Button
+from cycloid_geometry import CycloidProfile, profile_cache, rotate, trig_basis
+from cycloid_graph import DependencyGraph
+from cycloid_render import BlitAnimation, ring_collection, set_ring
+from cycloid_timing import FrameTimer
 
 fig, ax = plt.subplots(figsize=(6,6))
 plt.subplots_adjust(left=0.15, bottom=0.35)
@@ -11,92 +15,53 @@ plt.xlim(-1.2*40,1.2*40)
 plt.ylim(-1.2*40,1.2*40)
 #plt.grid()
 t = np.linspace(0, 2*np.pi, 4000)
+basis = trig_basis(t)
 delta = 1
+blit = True # redraw only the moving parts, fixed pins stay in the background
+profile_frames = False # per-stage timing overlay, frame_trace.json on close (also CYCLOID_PROFILE=1)
 
 
 ## draw pin
-num_pins = 61
-pins = [ax.plot([], [], 'k-')[0] for n in range(num_pins)]
-def draw_pin_init():
-    for p in pins:
-        p.set_data([0], [0])
-
-def pin_update(n,d,D):
-    for i in range(int(n)):    
-        x = (d/2*np.sin(t)+ D/2*np.cos(2*i*np.pi/n))
-        y = (d/2*np.cos(t) + D/2*np.sin(2*i*np.pi/n))
-        pins[i].set_data(x,y)
+pins = ring_collection(ax, 'k')
+def pin_update(ring):
+    set_ring(pins, ring)
  
 
 ## draw inner_pin
-num_inner_pins = 10
-inner_pins = [ax.plot([], [], 'g-')[0] for n in range(num_inner_pins)]
-def draw_inner_pin_init():
-    for p in inner_pins:
-        p.set_data([0], [0])
-
-def inner_pin_update(n,N,rd,Rd,phi):
-    for i in range(int(n)):    
-        x = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) - (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3)
-        y = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3)
-        inner_pins[i].set_data(x,y)
+inner_pins = ring_collection(ax, 'g')
+def inner_pin_update(ring,N,phi):
+    set_ring(inner_pins, rotate(ring, -phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3))
 
 
 ## draw drive_pin
 d0, = ax.plot([0], [0],'k-', lw=2)
-def drive_pin_update(r):
-    x = r*np.sin(t)
-    y = r*np.cos(t)
-    d0.set_data([x], [y])
+def drive_pin_update(circle):
+    d0.set_data([circle[0]], [circle[1]])
 
 
 #inner circleA:
-num_inner_circlesA = 10
-inner_circlesA = [ax.plot([], [], 'r-')[0] for n in range(num_inner_circlesA)]
-def draw_inner_circleA_init():
-    for p in inner_circlesA:
-        p.set_data([0], [0])
-
-def update_inner_circleA(e,n,N,rd,Rd, phi):
-    for i in range(int(n)):
-        x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + e*np.cos(phi)
-        y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + e*np.sin(phi)        
-        inner_circlesA[i].set_data(x,y)
+inner_circlesA = ring_collection(ax, 'r')
+def update_inner_circleA(ring,e,N, phi):
+    set_ring(inner_circlesA, rotate(ring, -phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3, e*np.cos(phi), e*np.sin(phi)))
 
 #inner circleB:
-num_inner_circlesB = 10
-inner_circlesB = [ax.plot([], [], 'b-')[0] for n in range(num_inner_circlesB)]
-def draw_inner_circleB_init():
-    for p in inner_circlesB:
-        p.set_data([0], [0])
-
-def update_inner_circleB(e,n,N,rd,Rd, phi):  
-    for i in range(int(n)):
-        x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)- np.pi/(3)) - e*np.cos(phi-np.pi/3)
-        y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)- np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)- np.pi/(3)) - e*np.sin(phi-np.pi/3)
-        inner_circlesB[i].set_data(x,y)
+inner_circlesB = ring_collection(ax, 'b')
+def update_inner_circleB(ring,e,N, phi):
+    set_ring(inner_circlesB, rotate(ring, -phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3, -e*np.cos(phi-np.pi/3), -e*np.sin(phi-np.pi/3)))
 
 
 #inner circleC:
-num_inner_circlesC = 10
-inner_circlesC = [ax.plot([], [], 'g-')[0] for n in range(num_inner_circlesC)]
-def draw_inner_circleC_init():
-    for p in inner_circlesC:
-        p.set_data([0], [0])
-
-def update_inner_circleC(e,n,N,rd,Rd, phi):
-    for i in range(int(n)):
-        x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1) + 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1) + 3*np.pi/(N-1)- np.pi/(3)) - e*np.cos(phi+np.pi/3)
-        y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1) + 3*np.pi/(N-1)- np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1) + 3*np.pi/(N-1)- np.pi/(3)) - e*np.sin(phi+np.pi/3)
-        inner_circlesC[i].set_data(x,y)
+inner_circlesC = ring_collection(ax, 'g')
+def update_inner_circleC(ring,e,N, phi):
+    set_ring(inner_circlesC, rotate(ring, -phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3, -e*np.cos(phi+np.pi/3), -e*np.sin(phi+np.pi/3)))
 
 
 ##inner pinA:
 inner_pinA, = ax.plot([0],[0],'r-')
 dotA, = ax.plot([0],[0], 'ro', ms=5)
-def update_inner_pinA(e,Rm, phi):
-    x = (Rm+e)*np.cos(t)+e*np.cos(phi)
-    y = (Rm+e)*np.sin(t)+e*np.sin(phi)
+def update_inner_pinA(circle,e,Rm, phi):
+    x = circle[0]+e*np.cos(phi)
+    y = circle[1]+e*np.sin(phi)
     inner_pinA.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi)+e*np.cos(phi)
@@ -107,9 +72,9 @@ def update_inner_pinA(e,Rm, phi):
 inner_pinB, = ax.plot([0],[0],'b-')
 dotB, = ax.plot([0],[0], 'bo', ms=5)
 
-def update_inner_pinB(e,Rm, phi):
-    x = (Rm+e)*np.cos(t)-e*np.cos(phi-np.pi/3)
-    y = (Rm+e)*np.sin(t)-e*np.sin(phi-np.pi/3)
+def update_inner_pinB(circle,e,Rm, phi):
+    x = circle[0]-e*np.cos(phi-np.pi/3)
+    y = circle[1]-e*np.sin(phi-np.pi/3)
     inner_pinB.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi+2*np.pi/3)-e*np.cos(phi-np.pi/3)
@@ -120,9 +85,9 @@ def update_inner_pinB(e,Rm, phi):
 inner_pinC, = ax.plot([0],[0],'g-')
 dotC, = ax.plot([0],[0], 'go', ms=5)
 
-def update_inner_pinC(e,Rm, phi):
-    x = (Rm+e)*np.cos(t)-e*np.cos(phi+np.pi/3)
-    y = (Rm+e)*np.sin(t)-e*np.sin(phi+np.pi/3)
+def update_inner_pinC(circle,e,Rm, phi):
+    x = circle[0]-e*np.cos(phi+np.pi/3)
+    y = circle[1]-e*np.sin(phi+np.pi/3)
     inner_pinC.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi-2*np.pi/3)-e*np.cos(phi+np.pi/3)
@@ -133,19 +98,9 @@ def update_inner_pinC(e,Rm, phi):
 ##ehypocycloidA:
 ehypocycloidA, = ax.plot([0], [0],'r-')
 edotA, = ax.plot([0],[0], 'ro', ms=5)
-def update_ehypocycloidA(e,n,D,d, phis):
-    RD=D/2
-    rd=d/2
-    rc = (n-1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)-e*np.cos((rc+rm)/rm*t)
-    ya = (rc+rm)*np.sin(t)-e*np.sin((rc+rm)/rm*t)
-
-    dxa = (rc+rm)*(-np.sin(t)+(e/rm)*np.sin((rc+rm)/rm*t))
-    dya = (rc+rm)*(np.cos(t)-(e/rm)*np.cos((rc+rm)/rm*t))
-
-    x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1))  + e*np.cos(phis)
-    y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1))  + e*np.sin(phis)
+profileA = CycloidProfile(t)
+def update_ehypocycloidA(base,e,n, phis):
+    x, y = rotate(base, -phis/(n-1), e*np.cos(phis), e*np.sin(phis), out=profileA.frame)
     ehypocycloidA.set_data([x], [y])
     edotA.set_data([x[0]], [y[0]])
 
@@ -153,20 +108,10 @@ def update_ehypocycloidA(e,n,D,d, phis):
 ##ehypocycloidB:
 ehypocycloidB, = ax.plot([0],[0],'b-')
 edotB, = ax.plot([0],[0], 'bo', ms=5)
+profileB = CycloidProfile(t, sign=1)
 
-def update_ehypocycloidB(e,n,D,d, phis):
-    RD=D/2
-    rd=d/2
-    rc = (n-1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-    ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-    dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-    dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t))
-
-    x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1) + np.pi/3/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1) + np.pi/3/(n-1))  - e*np.cos(phis-np.pi/3)
-    y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1) + np.pi/3/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1) + np.pi/3/(n-1))  - e*np.sin(phis-np.pi/3)
+def update_ehypocycloidB(base,e,n, phis):
+    x, y = rotate(base, -phis/(n-1) + np.pi/3/(n-1), -e*np.cos(phis-np.pi/3), -e*np.sin(phis-np.pi/3), out=profileB.frame)
     ehypocycloidB.set_data([x], [y])
 
     edotB.set_data([x[0]], [y[0]])
@@ -175,19 +120,9 @@ def update_ehypocycloidB(e,n,D,d, phis):
 ##ehypocycloidC:
 ehypocycloidC, = ax.plot([0],[0],'g-')
 edotC, = ax.plot([0],[0], 'go', ms=5)
-def update_ehypocycloidC(e,n,D,d, phis):
-    RD=D/2
-    rd=d/2
-    rc = (n-1)*(RD/n)
-    rm = (RD/n)
-    xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-    ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-    dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-    dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t))
-
-    x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1) - np.pi/3/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1) - np.pi/3/(n-1))  - e*np.cos(phis+np.pi/3)
-    y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1) - np.pi/3/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1) - np.pi/3/(n-1))  - e*np.sin(phis+np.pi/3)
+profileC = CycloidProfile(t, sign=1)  # frame buffer only, base from profileB
+def update_ehypocycloidC(base,e,n, phis):
+    x, y = rotate(base, -phis/(n-1) - np.pi/3/(n-1), -e*np.cos(phis+np.pi/3), -e*np.sin(phis+np.pi/3), out=profileC.frame)
     ehypocycloidC.set_data([x], [y])
 
     edotC.set_data([x[0]], [y[0]])
@@ -215,30 +150,39 @@ sli_N = Slider(ax_N, 'N', 3, 40, valinit=10, valstep=delta)
 sli_d = Slider(ax_d, 'd', 2, 20, valinit=10,valstep=delta)
 sli_D = Slider(ax_D, 'D', 5, 100, valinit=80,valstep=delta)
 
-def update(val):
-    sfm = sli_Rm.val
-    sRm = sli_Rm.val
-    sRd = sli_Rd.val
-    sn = sli_n.val
-    srd = sli_rd.val    
-    se = sli_e.val
-    sN = sli_N.val
-    sd = sli_d.val
-    sD = sli_D.val
-    ax.set_xlim(-1.2*0.5*sD,1.2*0.5*sD)
-    ax.set_ylim(-1.2*0.5*sD,1.2*0.5*sD)
-
-
-
-sli_fm.on_changed(update)
-sli_Rm.on_changed(update)
-sli_Rd.on_changed(update)
-sli_n.on_changed(update)
-sli_rd.on_changed(update)
-sli_e.on_changed(update)
-sli_N.on_changed(update)
-sli_d.on_changed(update)
-sli_D.on_changed(update)
+sliders = {'fm': sli_fm, 'Rm': sli_Rm, 'n': sli_n, 'Rd': sli_Rd, 'rd': sli_rd,
+           'e': sli_e, 'N': sli_N, 'd': sli_d, 'D': sli_D}
+
+## geometry per slider: a slider change only rebuilds the nodes below it,
+## the three discs share one eccentric circle, one hole ring and two profiles
+graph = DependencyGraph(**{name: sli.val for name, sli in sliders.items()})
+graph.node('view', ['D'], lambda D: (-1.2*0.5*D, 1.2*0.5*D))
+graph.node('pins', ['N','d','D'], lambda N,d,D: profile_cache.pin_ring(N,d,D,t))
+graph.node('drive', ['Rm'], lambda Rm: Rm*np.array([basis.sin, basis.cos]))
+graph.node('inner_pins', ['n','rd','Rd'], lambda n,rd,Rd: profile_cache.pin_ring(n,2*rd,2*Rd,t))
+graph.node('holes', ['n','rd','Rd','e'], lambda n,rd,Rd,e: profile_cache.hole_ring(n,rd+e,Rd,t))
+graph.node('eccentric', ['Rm','e'], lambda Rm,e: (Rm+e)*np.array([basis.cos, basis.sin]))
+graph.node('disc', ['e','N','D','d'], profileA.update)
+graph.node('mirror', ['e','N','D','d'], profileB.update)
+static_nodes = {'view', 'pins', 'drive'}
+
+def update(name, val):
+    # moving bodies pick up their dirty nodes on the next frame, the
+    # background is only redrawn when static geometry changed
+    dirty = graph.set(name, val)
+    if dirty & static_nodes:
+        update_static()
+        if blit:
+            ani.invalidate()
+
+def update_static():
+    ax.set_xlim(*graph['view'])
+    ax.set_ylim(*graph['view'])
+    pin_update(graph['pins'])
+    drive_pin_update(graph['drive'])
+
+for name, sli in sliders.items():
+    sli.on_changed(lambda val, name=name: update(name, val))
 
 resetax = plt.axes([0.85, 0.001, 0.1, 0.04])
 button = Button(resetax, 'Reset', color=axcolor, hovercolor='0.975')
@@ -257,42 +201,49 @@ def reset(event):
 button.on_clicked(reset)
 
 def animate(frame):
-    sfm = sli_fm.val
-    sRm = sli_Rm.val
-    sRd = sli_Rd.val
-    sn = sli_n.val
-    srd = sli_rd.val    
-    se = sli_e.val
-    sN = sli_N.val
-    sd = sli_d.val
-    sD = sli_D.val
+    v = graph.values
+    sRm = v['Rm']
+    se = v['e']
+    sN = v['N']
     frame = frame+1
-    phi = 2*np.pi*frame/sfm
+    phi = 2*np.pi*frame/v['fm']
 
-    draw_pin_init()
-    draw_inner_pin_init()
-    draw_inner_circleA_init()
-    draw_inner_circleB_init()
-    draw_inner_circleC_init()
-    pin_update(sN,sd,sD)
+    if not blit:
+        update_static()
 
-    update_inner_pinA(se,sRm, phi)
-    update_inner_pinB(se,sRm, phi)
-    update_inner_pinC(se,sRm, phi)
+    eccentric = graph['eccentric']
+    update_inner_pinA(eccentric,se,sRm, phi)
+    update_inner_pinB(eccentric,se,sRm, phi)
+    update_inner_pinC(eccentric,se,sRm, phi)
 
-    inner_pin_update(sn,sN,srd,sRd,phi)    
+    inner_pin_update(graph['inner_pins'],sN,phi)    
 
-    drive_pin_update(sRm)
-    update_inner_circleA(se,sn,sN,srd,sRd, phi)
-    update_inner_circleB(se,sn,sN,srd,sRd, phi)
-    update_inner_circleC(se,sn,sN,srd,sRd, phi)    
+    holes = graph['holes']
+    update_inner_circleA(holes,se,sN, phi)
+    update_inner_circleB(holes,se,sN, phi)
+    update_inner_circleC(holes,se,sN, phi)    
 
-    update_ehypocycloidA(se,sN,sD,sd, phi)
-    update_ehypocycloidB(se,sN,sD,sd, phi)
-    update_ehypocycloidC(se,sN,sD,sd, phi)
+    update_ehypocycloidA(graph['disc'],se,sN, phi)
+    update_ehypocycloidB(graph['mirror'],se,sN, phi)
+    update_ehypocycloidC(graph['mirror'],se,sN, phi)
 
+    if blit:
+        return moving
     fig.canvas.draw_idle()
 
-ani = animation.FuncAnimation(fig, animate,frames=sli_fm.val*(sli_N.val-1), interval=150)
+moving = ([inner_pins, inner_circlesA, inner_circlesB, inner_circlesC,
+           inner_pinA, dotA, inner_pinB, dotB, inner_pinC, dotC,
+           ehypocycloidA, edotA, ehypocycloidB, edotB, ehypocycloidC, edotC])
+timer = FrameTimer(profile_frames or None)
+timer.instrument(globals())
+timer.attach(fig)
+moving += timer.overlay(ax)
+if timer.enabled:
+    fig.canvas.mpl_connect('close_event', lambda event: print('saved', timer.dump('frame_trace.json')))
+update_static()
+if blit:
+    ani = BlitAnimation(fig, timer.frame(animate), sli_fm.val*(sli_N.val-1), 150, moving)
+else:
+    ani = animation.FuncAnimation(fig, timer.frame(animate),frames=sli_fm.val*(sli_N.val-1), interval=150)
 dpi=100
 plt.show()
@@ -2,6 +2,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.widgets import Slider, Button, RadioButtons
+from cycloid_geometry import CycloidProfile, profile_cache, rotate, trig_basis
+from cycloid_render import BlitAnimation, FrameTape, LevelOfDetail, SliderCoalescer, ring_collection, set_ring
+from cycloid_analysis import undercut_margin
+from cycloid_timing import FrameTimer
 
 
 fig, ax = plt.subplots(figsize=(6,6))
@@ -12,131 +16,82 @@ plt.xlim(-1.4*40,1.4*40)
 plt.ylim(-1.4*40,1.4*40)
 #plt.grid()
 t = np.linspace(0, 2*np.pi, 10000)
+basis = trig_basis(t)
 delta = 1
 mode_fig = 0
 pin_fig = 0
 cycloid_fig = 1  
 curve_fig = 0
+blit = True # redraw only the moving parts on top of a cached background
+precompute = False # record one period of frames, then loop it from memory (kiosk)
+profile_frames = False # per-stage timing overlay, frame_trace.json on close (also CYCLOID_PROFILE=1)
+report_latency = False # print slider drag-to-pixels latency when the window closes
+lod = LevelOfDetail(t, coarse=512, idle=0.5) # 512 samples while dragging, full t once idle
 
 
 ## draw pin
-num_pins = 61
-pins = [ax.plot([], [], 'k-')[0] for n in range(num_pins)]
-def draw_pin_init():
-    for p in pins:
-        p.set_data([0], [0])
-
+pins = ring_collection(ax, 'k')
 def pin_update(n,d,D,phi):
     global mode_fig 
-    for i in range(int(n)): 
-        if mode_fig == 1:        
-            x = (d/2*np.sin(t)+ D/2*np.cos(2*i*np.pi/n))
-            y = (d/2*np.cos(t) + D/2*np.sin(2*i*np.pi/n))
-        if mode_fig == 0:
-            x = (d/2*np.sin(t)+ D/2*np.cos(2*i*np.pi/n))*np.cos(phi/(n)) - (d/2*np.cos(t) + D/2*np.sin(2*i*np.pi/n))*np.sin(phi/(n))
-            y = (d/2*np.sin(t)+ D/2*np.cos(2*i*np.pi/n))*np.sin(phi/(n)) + (d/2*np.cos(t) + D/2*np.sin(2*i*np.pi/n))*np.cos(phi/(n))
-        pins[i].set_data(x,y)
+    ring = profile_cache.pin_ring(n,d,D,t)
+    if mode_fig == 0:
+        ring = rotate(ring, phi/(n))
+    set_ring(pins, ring)
 
 ## draw inner_pin
-num_inner_pins = 10
-inner_pins = [ax.plot([], [], 'k-')[0] for n in range(num_inner_pins)]
-def draw_inner_pin_init():
-    for p in inner_pins:
-        p.set_data([0], [0])
+inner_pins = ring_collection(ax, 'k')
+def inner_pin_angle(N, phi):
+    # the output pins turn with the disc in mode 1, stand still in mode 0
+    global mode_fig 
+    if mode_fig == 1:
+        return -phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3
+    return 3*np.pi/(N-1)-np.pi/3
 
 def inner_pin_update(n,N,rd,Rd,phi):
-    global mode_fig 
-    for i in range(int(n)):   
-        if mode_fig == 1:
-            x = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) - (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3)
-            y = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3)
-        if mode_fig == 0:        
-            x = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1)-np.pi/3) - (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1)-np.pi/3)
-            y = (rd*np.sin(t)+ Rd*np.cos(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1)-np.pi/3) + (rd*np.cos(t) + Rd*np.sin(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1)-np.pi/3)        
-        inner_pins[i].set_data(x,y)        
+    ring = profile_cache.pin_ring(n,2*rd,2*Rd,t)
+    set_ring(inner_pins, rotate(ring, inner_pin_angle(N, phi)))
 
 
 ## draw drive_pin
 d0, = ax.plot([0],[0],'k-', lw=2)
 def drive_pin_update(r):
-    x = r*np.sin(t)
-    y = r*np.cos(t)
+    x = r*basis.sin
+    y = r*basis.cos
     d0.set_data([x], [y])
 
 
 #inner circleA:
-num_inner_circlesA = 10
-inner_circlesA = [ax.plot([], [], 'r-')[0] for n in range(num_inner_circlesA)]
-def draw_inner_circleA_init():
-    for p in inner_circlesA:
-        p.set_data([0], [0])
-
+inner_circlesA = ring_collection(ax, 'r')
 def update_inner_circleA(e,n,N,rd,Rd, phi):
-    global mode_fig    
-    for i in range(int(n)):
-        if mode_fig == 1:
-            x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + e*np.cos(phi)
-            y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)-np.pi/3) + e*np.sin(phi)        
-        if mode_fig == 0:
-            x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1)-np.pi/3) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1)-np.pi/3) + e*np.cos(phi)
-            y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1)-np.pi/3) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1)-np.pi/3) + e*np.sin(phi)        
-        inner_circlesA[i].set_data(x,y)         
+    ring = profile_cache.hole_ring(n,rd+e,Rd,t)
+    set_ring(inner_circlesA, rotate(ring, inner_pin_angle(N, phi), e*np.cos(phi), e*np.sin(phi)))
         
 
 #inner circleB:
-num_inner_circlesB = 10
-inner_circlesB = [ax.plot([], [], 'b-')[0] for n in range(num_inner_circlesB)]
-def draw_inner_circleB_init():
-    for p in inner_circlesB:
-        p.set_data([0], [0])
-
+inner_circlesB = ring_collection(ax, 'b')
 def update_inner_circleB(e,n,N,rd,Rd, phi):
-    global mode_fig
     global cycloid_fig       
-    for i in range(int(n)):
-        if mode_fig == 1:
-            if cycloid_fig == 3:
-                x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)- np.pi/(3)) - e*np.cos(phi-np.pi/3)
-                y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1)+ 3*np.pi/(N-1)- np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1)+ 3*np.pi/(N-1)- np.pi/(3)) - e*np.sin(phi-np.pi/3)
-            if cycloid_fig == 2:
-                x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1) + 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1) + 3*np.pi/(N-1) - np.pi/(3)) - e*np.cos(phi)
-                y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1) + 3*np.pi/(N-1) - np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1) + 3*np.pi/(N-1) - np.pi/(3)) - e*np.sin(phi)
-         
-        if mode_fig == 0:
-            if cycloid_fig == 3:            
-                x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1)- np.pi/(3)) - e*np.cos(phi-np.pi/3)
-                y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1) - np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1)- np.pi/(3)) - e*np.sin(phi-np.pi/3)
-            if cycloid_fig == 2:            
-                x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1) - np.pi/(3)) - e*np.cos(phi)
-                y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1) - np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1) - np.pi/(3)) - e*np.sin(phi)
-        inner_circlesB[i].set_data(x,y)           
+    ring = profile_cache.hole_ring(n,rd+e,Rd,t)
+    if cycloid_fig == 3:
+        shift = phi-np.pi/3
+    else:
+        shift = phi
+    set_ring(inner_circlesB, rotate(ring, inner_pin_angle(N, phi), -e*np.cos(shift), -e*np.sin(shift)))
     
 
 #inner circleC:
-num_inner_circlesC = 10
-inner_circlesC = [ax.plot([], [], 'g-')[0] for n in range(num_inner_circlesC)]
-def draw_inner_circleC_init():
-    for p in inner_circlesC:
-        p.set_data([0], [0])
-
+inner_circlesC = ring_collection(ax, 'g')
 def update_inner_circleC(e,n,N,rd,Rd, phi):
-    global mode_fig     
-    for i in range(int(n)):
-        if mode_fig == 1:
-            x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos(-phi/(N-1) + 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin(-phi/(N-1) + 3*np.pi/(N-1)- np.pi/(3)) - e*np.cos(phi+np.pi/3)
-            y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin(-phi/(N-1) + 3*np.pi/(N-1)- np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos(-phi/(N-1) + 3*np.pi/(N-1)- np.pi/(3)) - e*np.sin(phi+np.pi/3)
-        if mode_fig == 0:
-            x = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1) - np.pi/(3)) - ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1)- np.pi/(3)) - e*np.cos(phi+np.pi/3)
-            y = ((rd+e)*np.cos(t)+Rd*np.cos(2*i*np.pi/n))*np.sin( 3*np.pi/(N-1) - np.pi/(3)) + ((rd+e)*np.sin(t)+Rd*np.sin(2*i*np.pi/n))*np.cos( 3*np.pi/(N-1)- np.pi/(3)) - e*np.sin(phi+np.pi/3)
-        inner_circlesC[i].set_data(x,y)                
+    ring = profile_cache.hole_ring(n,rd+e,Rd,t)
+    set_ring(inner_circlesC, rotate(ring, inner_pin_angle(N, phi), -e*np.cos(phi+np.pi/3), -e*np.sin(phi+np.pi/3)))
        
 
 ##inner pinA:
 inner_pinA, = ax.plot([0],[0],'r-')
 dotA, = ax.plot([0],[0], 'ro', ms=5)
 def update_inner_pinA(e,Rm, phi):
-    x = (Rm+e)*np.cos(t)+e*np.cos(phi)
-    y = (Rm+e)*np.sin(t)+e*np.sin(phi)
+    x = (Rm+e)*basis.cos+e*np.cos(phi)
+    y = (Rm+e)*basis.sin+e*np.sin(phi)
     inner_pinA.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi)+e*np.cos(phi)
@@ -149,11 +104,11 @@ dotB, = ax.plot([0],[0], 'bo', ms=5)
 def update_inner_pinB(e,Rm, phi):
     global cycloid_fig   
     if cycloid_fig==3:  
-        x = (Rm+e)*np.cos(t)-e*np.cos(phi-np.pi/3)
-        y = (Rm+e)*np.sin(t)-e*np.sin(phi-np.pi/3)
+        x = (Rm+e)*basis.cos-e*np.cos(phi-np.pi/3)
+        y = (Rm+e)*basis.sin-e*np.sin(phi-np.pi/3)
     if cycloid_fig==2:  
-        x = (Rm+e)*np.cos(t)-e*np.cos(phi)
-        y = (Rm+e)*np.sin(t)-e*np.sin(phi)        
+        x = (Rm+e)*basis.cos-e*np.cos(phi)
+        y = (Rm+e)*basis.sin-e*np.sin(phi)        
     inner_pinB.set_data([x], [y])
     if cycloid_fig==3:      
         x1 = (Rm+e)*np.cos(phi+2*np.pi/3)-e*np.cos(phi-np.pi/3)
@@ -168,8 +123,8 @@ def update_inner_pinB(e,Rm, phi):
 inner_pinC, = ax.plot([0],[0],'g-')
 dotC, = ax.plot([0],[0], 'go', ms=5)
 def update_inner_pinC(e,Rm, phi):
-    x = (Rm+e)*np.cos(t)-e*np.cos(phi+np.pi/3)
-    y = (Rm+e)*np.sin(t)-e*np.sin(phi+np.pi/3)
+    x = (Rm+e)*basis.cos-e*np.cos(phi+np.pi/3)
+    y = (Rm+e)*basis.sin-e*np.sin(phi+np.pi/3)
     inner_pinC.set_data([x], [y])
     
     x1 = (Rm+e)*np.cos(phi-2*np.pi/3)-e*np.cos(phi+np.pi/3)
@@ -180,65 +135,31 @@ def update_inner_pinC(e,Rm, phi):
 ##ehypocycloidA:
 ehypocycloidA, = ax.plot([0], [0],'r-')
 edotA, = ax.plot([0],[0], 'ro', ms=5)
+profileA = CycloidProfile(t)
 def update_ehypocycloidA(lamuda,e,n,D,d, phis):
     global mode_fig    
     global curve_fig 
     if mode_fig == 1:
         if curve_fig == 0:
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-            xa = (rc+rm)*np.cos(t)-e*np.cos((rc+rm)/rm*t)
-            ya = (rc+rm)*np.sin(t)-e*np.sin((rc+rm)/rm*t)
-
-            dxa = (rc+rm)*(-np.sin(t)+(e/rm)*np.sin((rc+rm)/rm*t))
-            dya = (rc+rm)*(np.cos(t)-(e/rm)*np.cos((rc+rm)/rm*t))        
-            x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1))  + e*np.cos(phis)
-            y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1))  + e*np.sin(phis)
+            profileA.update(e,n,D,d)
+            x, y = profileA.place(-phis/(n-1), e*np.cos(phis), e*np.sin(phis))
             ehypocycloidA.set_data([x], [y])
             edotA.set_data([x[0]], [y[0]])   
         if curve_fig == 1:
-            #lamuda = 0.9
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-            xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-            ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))         
-            
-            x = (xa)*np.cos(-phis/(n-1))-(ya)*np.sin(-phis/(n-1))  + e*np.cos(phis)
-            y = (xa)*np.sin(-phis/(n-1))+(ya)*np.cos(-phis/(n-1))  + e*np.sin(phis)
+            profileA.update(e,n,D,d,lamuda)
+            x, y = profileA.place(-phis/(n-1), e*np.cos(phis), e*np.sin(phis))
             ehypocycloidA.set_data([x], [y])
             edotA.set_data([x[0]], [y[0]])  
 
     if mode_fig == 0:
         if curve_fig == 0:
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-            xa = (rc+rm)*np.cos(t)-e*np.cos((rc+rm)/rm*t)
-            ya = (rc+rm)*np.sin(t)-e*np.sin((rc+rm)/rm*t)
-
-            dxa = (rc+rm)*(-np.sin(t)+(e/rm)*np.sin((rc+rm)/rm*t))
-            dya = (rc+rm)*(np.cos(t)-(e/rm)*np.cos((rc+rm)/rm*t))          
-
-            x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))  + e*np.cos(phis)
-            y = (ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)  + e*np.sin(phis)
+            profileA.update(e,n,D,d)
+            x, y = profileA.place(0, e*np.cos(phis), e*np.sin(phis))
             ehypocycloidA.set_data([x], [y])
             edotA.set_data([x[0]], [y[0]]) 
         if curve_fig == 1:
-            #lamuda = 0.9
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-            xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-            ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))           
-
-            x = (xa)  + e*np.cos(phis)
-            y = (ya)  + e*np.sin(phis)
+            profileA.update(e,n,D,d,lamuda)
+            x, y = profileA.place(0, e*np.cos(phis), e*np.sin(phis))
             ehypocycloidA.set_data([x], [y])
             edotA.set_data([x[0]], [y[0]])     
 
@@ -246,6 +167,7 @@ def update_ehypocycloidA(lamuda,e,n,D,d, phis):
 ##ehypocycloidB:
 ehypocycloidB, = ax.plot([0],[0],'b-')
 edotB, = ax.plot([0],[0], 'bo', ms=5)
+profileB = CycloidProfile(t, sign=1)
 def update_ehypocycloidB(lamuda,e,n,D,d, phis):
     global mode_fig
     global cycloid_fig
@@ -254,130 +176,51 @@ def update_ehypocycloidB(lamuda,e,n,D,d, phis):
     if mode_fig == 1:
         if cycloid_fig == 3:
             if curve_fig == 0:
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-                xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-                ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-                dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-                dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t))                
-                x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1) + np.pi/3/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1) + np.pi/3/(n-1))  - e*np.cos(phis-np.pi/3)
-                y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1) + np.pi/3/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1) + np.pi/3/(n-1))  - e*np.sin(phis-np.pi/3)
+                profileB.update(e,n,D,d)
+                x, y = profileB.place(-phis/(n-1) + np.pi/3/(n-1), -e*np.cos(phis-np.pi/3), -e*np.sin(phis-np.pi/3))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])  
 
             if curve_fig == 1:
-                #lamuda = 0.9
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-
-                xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-                ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))   
-
-
-                x = (xa)*np.cos(-phis/(n-1) + np.pi/3/(n-1) + np.pi/(n-1))-(ya)*np.sin(-phis/(n-1) + np.pi/3/(n-1) + np.pi/(n-1))  - e*np.cos(phis-np.pi/3)
-                y = (xa)*np.sin(-phis/(n-1) + np.pi/3/(n-1) + np.pi/(n-1))+(ya)*np.cos(-phis/(n-1) + np.pi/3/(n-1) + np.pi/(n-1))  - e*np.sin(phis-np.pi/3)
+                profileB.update(e,n,D,d,lamuda)
+                x, y = profileB.place(-phis/(n-1) + np.pi/3/(n-1) + np.pi/(n-1), -e*np.cos(phis-np.pi/3), -e*np.sin(phis-np.pi/3))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])                  
 
         if cycloid_fig == 2:
             if curve_fig == 0:
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-                xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-                ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-                dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-                dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t)) 
-
-                x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1) )-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1))  - e*np.cos(phis)
-                y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1) )+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1))  - e*np.sin(phis)
+                profileB.update(e,n,D,d)
+                x, y = profileB.place(-phis/(n-1), -e*np.cos(phis), -e*np.sin(phis))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])       
     
             if curve_fig == 1:
-                #lamuda = 0.9
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-                xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-                ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))   
-
-                #dxa = xa*np.cos(np.pi/(n-1)) - ya*np.sin(np.pi/(n-1))
-                #dya = xa*np.sin(np.pi/(n-1)) + ya*np.cos(np.pi/(n-1))
-
-                x = (xa)*np.cos(-phis/(n-1) + np.pi/(n-1))-(ya)*np.sin(-phis/(n-1) + np.pi/(n-1))  - e*np.cos(phis)
-                y = (xa)*np.sin(-phis/(n-1) + np.pi/(n-1) )+(ya)*np.cos(-phis/(n-1) + np.pi/(n-1))  - e*np.sin(phis)
+                profileB.update(e,n,D,d,lamuda)
+                x, y = profileB.place(-phis/(n-1) + np.pi/(n-1), -e*np.cos(phis), -e*np.sin(phis))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])    
     if mode_fig == 0:
         if cycloid_fig == 3:   
             if curve_fig == 0:
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-                xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-                ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-                dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-                dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t)) 
-
-                x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos( np.pi/3/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin( np.pi/3/(n-1))  - e*np.cos(phis-np.pi/3)
-                y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin( np.pi/3/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos( np.pi/3/(n-1))  - e*np.sin(phis-np.pi/3)
+                profileB.update(e,n,D,d)
+                x, y = profileB.place(np.pi/3/(n-1), -e*np.cos(phis-np.pi/3), -e*np.sin(phis-np.pi/3))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])   
             if curve_fig == 1:
-                #lamuda = 0.9
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-                xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-                ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))   
-
-
-                x = (xa)*np.cos( np.pi/3/(n-1) + np.pi/(n-1))-(ya)*np.sin( np.pi/3/(n-1) + np.pi/(n-1))  - e*np.cos(phis-np.pi/3)
-                y = (xa)*np.sin( np.pi/3/(n-1) + np.pi/(n-1))+(ya)*np.cos( np.pi/3/(n-1) + np.pi/(n-1))  - e*np.sin(phis-np.pi/3)
+                profileB.update(e,n,D,d,lamuda)
+                x, y = profileB.place(np.pi/3/(n-1) + np.pi/(n-1), -e*np.cos(phis-np.pi/3), -e*np.sin(phis-np.pi/3))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])                         
         if cycloid_fig == 2:   
             if curve_fig == 0:
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-                xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-                ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-                dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-                dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t)) 
-
-
-
-                x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))  - e*np.cos(phis)
-                y = (ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)  - e*np.sin(phis)
+                profileB.update(e,n,D,d)
+                x, y = profileB.place(0, -e*np.cos(phis), -e*np.sin(phis))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])           
     
             if curve_fig == 1:
-                #lamuda = 0.9
-                RD=D/2
-                rd=d/2
-                rc = (n-1)*(RD/n)
-                rm = (RD/n)
-                xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-                ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))   
-
-                x = (xa)*np.cos(np.pi/(n-1))-(ya)*np.sin(np.pi/(n-1))  - e*np.cos(phis)
-                y = (xa)*np.sin(np.pi/(n-1))+(ya)*np.cos(np.pi/(n-1))  - e*np.sin(phis)
+                profileB.update(e,n,D,d,lamuda)
+                x, y = profileB.place(np.pi/(n-1), -e*np.cos(phis), -e*np.sin(phis))
                 ehypocycloidB.set_data([x], [y])
                 edotB.set_data([x[0]], [y[0]])  
 
@@ -385,73 +228,32 @@ def update_ehypocycloidB(lamuda,e,n,D,d, phis):
 ##ehypocycloidC:
 ehypocycloidC, = ax.plot([0],[0],'g-')
 edotC, = ax.plot([0],[0], 'go', ms=5)
+profileC = CycloidProfile(t, sign=1)
 def update_ehypocycloidC(lamuda,e,n,D,d, phis):
     global mode_fig
     global curve_fig
     if mode_fig == 1:
         if curve_fig == 0:
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-            xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-            ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-            dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-            dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t))
-
-            x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(-phis/(n-1) - np.pi/3/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(-phis/(n-1) - np.pi/3/(n-1))  - e*np.cos(phis+np.pi/3)
-            y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(-phis/(n-1) - np.pi/3/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(-phis/(n-1) - np.pi/3/(n-1))  - e*np.sin(phis+np.pi/3)
-            
+            profileC.update(e,n,D,d)
+            x, y = profileC.place(-phis/(n-1) - np.pi/3/(n-1), -e*np.cos(phis+np.pi/3), -e*np.sin(phis+np.pi/3))
             ehypocycloidC.set_data([x], [y])
             edotC.set_data([x[0]], [y[0]])   
 
         if curve_fig == 1:
-            #lamuda = 0.9
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-
-            xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-            ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))   
-
-
-            x = (xa)*np.cos(-phis/(n-1) - np.pi/3/(n-1) + np.pi/(n-1))-(ya)*np.sin(-phis/(n-1) - np.pi/3/(n-1) + np.pi/(n-1))  - e*np.cos(phis+np.pi/3)
-            y = (xa)*np.sin(-phis/(n-1) - np.pi/3/(n-1) + np.pi/(n-1))+(ya)*np.cos(-phis/(n-1) - np.pi/3/(n-1) + np.pi/(n-1))  - e*np.sin(phis+np.pi/3)
-            
+            profileC.update(e,n,D,d,lamuda)
+            x, y = profileC.place(-phis/(n-1) - np.pi/3/(n-1) + np.pi/(n-1), -e*np.cos(phis+np.pi/3), -e*np.sin(phis+np.pi/3))
             ehypocycloidC.set_data([x], [y])
             edotC.set_data([x[0]], [y[0]]) 
 
     if mode_fig == 0:  
         if curve_fig == 0:
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-            xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-            ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-            dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-            dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t))                  
-            x = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos( - np.pi/3/(n-1))-(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin( - np.pi/3/(n-1))  - e*np.cos(phis+np.pi/3)
-            y = (xa + rd/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin( - np.pi/3/(n-1))+(ya + rd/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos( - np.pi/3/(n-1))  - e*np.sin(phis+np.pi/3)
-     
+            profileC.update(e,n,D,d)
+            x, y = profileC.place(-np.pi/3/(n-1), -e*np.cos(phis+np.pi/3), -e*np.sin(phis+np.pi/3))
             ehypocycloidC.set_data([x], [y])
             edotC.set_data([x[0]], [y[0]])   
         if curve_fig == 1:
-            #lamuda = 0.9
-            RD=D/2
-            rd=d/2
-            rc = (n-1)*(RD/n)
-            rm = (RD/n)
-
-            xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-rd*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-            ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-rd*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t))   
-                
-            x = (xa)*np.cos( - np.pi/3/(n-1) + np.pi/(n-1))-(ya)*np.sin( - np.pi/3/(n-1) + np.pi/(n-1))  - e*np.cos(phis+np.pi/3)
-            y = (xa)*np.sin( - np.pi/3/(n-1) + np.pi/(n-1))+(ya)*np.cos( - np.pi/3/(n-1) + np.pi/(n-1))  - e*np.sin(phis+np.pi/3)
-     
+            profileC.update(e,n,D,d,lamuda)
+            x, y = profileC.place(-np.pi/3/(n-1) + np.pi/(n-1), -e*np.cos(phis+np.pi/3), -e*np.sin(phis+np.pi/3))
             ehypocycloidC.set_data([x], [y])
             edotC.set_data([x[0]], [y[0]])  
 
@@ -459,60 +261,25 @@ def update_ehypocycloidC(lamuda,e,n,D,d, phis):
 ##ehypocycloid_Pin:
 ehypocycloid_Pin, = ax.plot([0],[0],'k-')
 edot_Pin, = ax.plot([0],[0], 'ko', ms=5)
+profile_Pin = CycloidProfile(t, sign=1)
 def update_ehypocycloid_Pin(lamuda,e,n,D,d, phis):
     global mode_fig
     global curve_fig
     if mode_fig == 1:
         if curve_fig == 0:
-            RD=D/2
-            rd=d/2
-            rc = (n)*(RD/(n+1))
-            rm = (RD/(n+1))
-            xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-            ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-            dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-            dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t))            
-            x = (xa + (rd-e)/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos( np.pi/(n)) - (ya + (rd-e)/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin( np.pi/(n)) 
-            y = (xa + (rd-e)/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin( np.pi/(n)) + (ya + (rd-e)/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos( np.pi/(n))
-            
+            profile_Pin.update(e,n+1,D,d-2*e)
+            x, y = profile_Pin.place(np.pi/(n))
         if curve_fig == 1:
-            #lamuda = 0.9
-            RD=D/2
-            rd=d/2
-            rc = (n)*(RD/(n+1))
-            rm = (RD/(n+1))
-            xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-(rd-e)*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-            ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-(rd-e)*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
-            x = (xa)
-            y = (ya)
+            profile_Pin.update(e,n+1,D,d-2*e,lamuda)
+            x, y = profile_Pin.place(0)
 
     if mode_fig == 0: 
         if curve_fig == 0:  
-            RD=D/2
-            rd=d/2
-            rc = (n)*(RD/(n+1))
-            rm = (RD/(n+1))
-            xa = (rc+rm)*np.cos(t)+e*np.cos((rc+rm)/rm*t)
-            ya = (rc+rm)*np.sin(t)+e*np.sin((rc+rm)/rm*t)
-
-            dxa = (rc+rm)*(-np.sin(t)-(e/rm)*np.sin((rc+rm)/rm*t))
-            dya = (rc+rm)*(np.cos(t)+(e/rm)*np.cos((rc+rm)/rm*t))               
-
-            x = (xa + (rd-e)/np.sqrt(dxa**2 + dya**2)*(-dya))*np.cos(phis/(n) + np.pi/(n))-(ya + (rd-e)/np.sqrt(dxa**2 + dya**2)*dxa)*np.sin(phis/(n) + np.pi/(n)) 
-            y = (xa + (rd-e)/np.sqrt(dxa**2 + dya**2)*(-dya))*np.sin(phis/(n) + np.pi/(n))+(ya + (rd-e)/np.sqrt(dxa**2 + dya**2)*dxa)*np.cos(phis/(n) + np.pi/(n)) 
+            profile_Pin.update(e,n+1,D,d-2*e)
+            x, y = profile_Pin.place(phis/(n) + np.pi/(n))
         if curve_fig == 1:
-            #lamuda = 0.9
-            RD=D/2
-            rd=d/2
-            rc = (n)*(RD/(n+1))
-            rm = (RD/(n+1))
-            xa = (rc+rm)*np.cos(t)-e*lamuda*np.cos((rc+rm)/rm*t)-(rd-e)*(np.cos(t) - lamuda*np.cos((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-            ya = (rc+rm)*np.sin(t)-e*lamuda*np.sin((rc+rm)/rm*t)-(rd-e)*(np.sin(t) - lamuda*np.sin((rc+rm)/rm*t))/np.sqrt(1 + lamuda**2 - 2*lamuda*np.cos(rc/rm*t)) 
-
-            x = (xa)*np.cos(phis/(n))-(ya)*np.sin(phis/(n)) 
-            y = (xa)*np.sin(phis/(n))+(ya)*np.cos(phis/(n))    
+            profile_Pin.update(e,n+1,D,d-2*e,lamuda)
+            x, y = profile_Pin.place(phis/(n))
     
     ehypocycloid_Pin.set_data([x], [y])
     edot_Pin.set_data([x[0]], [y[0]])
@@ -541,31 +308,57 @@ sli_N = Slider(ax_N, 'N', 2, 40, valinit=10, valstep=delta)
 sli_d = Slider(ax_d, 'd', 2, 20, valinit=10,valstep=delta)
 sli_D = Slider(ax_D, 'D', 5, 150, valinit=80,valstep=delta)
 
-def update(val):
-    lamuda = sli_la.val
-    sfm = sli_Rm.val
+def undercut_warning(e,N,D,d):
+    # closed form for the exact (la = 1) profiles only: the disc, and with
+    # NonePin the pin side curve (e, N+1, D, d-2e) drawn in its place. The
+    # Curve_2 (la) outlines are not covered, hence 'exact profile' in the title
+    checks = [('disc', N, D/(2*N), undercut_margin(e,N,D,d))]
+    if pin_fig == 1:
+        checks.append(('pin curve', N+1, D/(2*(N+1)), undercut_margin(e,N+1,D,d-2*e)))
+    msgs = []
+    for name, k, rm, margin in checks:
+        if margin == -np.inf:
+            msgs.append('%s loops, e >= D/(2*%d) = %.2f' % (name, k, rm))
+        elif margin < 0:
+            msgs.append('%s: d/2 exceeds the curvature radius by %.2f mm' % (name, -margin))
+    if msgs:
+        ax.set_title('Exact profile undercut: ' + '; '.join(msgs), color='r')
+    else:
+        ax.set_title('')
+
+def update(changed):
+    # latest values of all sliders moved since the last tick, applied once
     sRm = sli_Rm.val
-    sRd = sli_Rd.val
-    sn = sli_n.val
-    srd = sli_rd.val    
     se = sli_e.val
     sN = sli_N.val
     sd = sli_d.val
     sD = sli_D.val
     ax.set_xlim(-1.4*0.5*sD,1.4*0.5*sD)
     ax.set_ylim(-1.4*0.5*sD,1.4*0.5*sD)
-
-
-sli_la.on_changed(update)
-sli_fm.on_changed(update)
-sli_Rm.on_changed(update)
-sli_Rd.on_changed(update)
-sli_n.on_changed(update)
-sli_rd.on_changed(update)
-sli_e.on_changed(update)
-sli_N.on_changed(update)
-sli_d.on_changed(update)
-sli_D.on_changed(update)
+    undercut_warning(se,sN,sD,sd)
+    lod.touch()
+    if blit:
+        drive_pin_update(sRm)
+        ani.invalidate()
+    else:
+        fig.canvas.draw_idle()
+
+def set_resolution(res):
+    # swap every curve over to another sample grid
+    global t, basis
+    t = res
+    basis = trig_basis(t)
+    for p in (profileA, profileB, profileC, profile_Pin):
+        p.resample(t)
+    if blit:
+        drive_pin_update(sli_Rm.val)
+        ani.invalidate()
+
+
+sliders = SliderCoalescer({'la': sli_la, 'fm': sli_fm, 'Rm': sli_Rm, 'Rd': sli_Rd, 'n': sli_n,
+                           'rd': sli_rd, 'e': sli_e, 'N': sli_N, 'd': sli_d, 'D': sli_D}, update)
+if report_latency:
+    fig.canvas.mpl_connect('close_event', lambda event: print(sliders.stats()))
 
 resetax = plt.axes([0.85, 0.001, 0.1, 0.04])
 button = Button(resetax, 'Reset', color=axcolor, hovercolor='0.975')
@@ -609,6 +402,7 @@ def pin_modefunc(label):
         pin_fig = 0
     if label == 'NonePin':
         pin_fig = 1
+    undercut_warning(sli_e.val,sli_N.val,sli_D.val,sli_d.val)
 radio_1.on_clicked(pin_modefunc)
 
 def cycloid_modefunc(label):
@@ -627,12 +421,16 @@ def curve_modefunc(label):
         curve_fig = 0
     if label == 'Curve_2':
         curve_fig = 1
+    ax_la.set_visible(curve_fig == 1)
 radio_3.on_clicked(curve_modefunc)
 
 def animate(frame):
     global pin_fig
     global cycloid_fig 
     global curve_fig 
+    sliders.flush()
+    if lod.t() is not t:
+        set_resolution(lod.t())
     sla = sli_la.val
     sfm = sli_fm.val
     sRm = sli_Rm.val
@@ -644,10 +442,19 @@ def animate(frame):
     sd = sli_d.val
     sD = sli_D.val
 
-    if curve_fig == 0:
-        ax_la.set_visible(0) 
-    if curve_fig == 1:    
-        ax_la.set_visible(1) 
+    # frames repeat after |fm|*(N-1) steps; once a frame is on the tape it
+    # is only played back. fm = 0 stands still, nothing to record
+    period = int(abs(sfm)*(sN-1)) if precompute else 0
+    if period:
+        slot = frame % period
+        tape.check((sla, sfm, sRm, sRd, sn, srd, se, sN, sd, sD,
+                    mode_fig, pin_fig, cycloid_fig, curve_fig, len(t)), period)
+        if tape.has(slot):
+            tape.play(slot)
+            if blit:
+                return moving
+            fig.canvas.draw_idle()
+            return
 
     if sfm == 0:
         phi = 0
@@ -655,11 +462,6 @@ def animate(frame):
         phi = 2*np.pi*frame/sfm
         frame = frame+1
 
-    draw_pin_init()
-    draw_inner_pin_init()
-    draw_inner_circleA_init()
-    draw_inner_circleB_init()
-    draw_inner_circleC_init()
     #ehypocycloid_Pin_init()    
 
     if pin_fig == 0:    
@@ -674,7 +476,8 @@ def animate(frame):
 
     inner_pin_update(sn,sN,srd,sRd,phi)    
     #inner_pin_update(sn,sN,srd,sRd,0)
-    drive_pin_update(sRm)
+    if not blit:
+        drive_pin_update(sRm)
 
     inner_pinB.set_visible(1)
     dotB.set_visible(1)        
@@ -684,6 +487,8 @@ def animate(frame):
     ehypocycloidC.set_visible(1)
     edotB.set_visible(1)
     edotC.set_visible(1)
+    inner_circlesB.set_visible(1)
+    inner_circlesC.set_visible(1)
 
     if cycloid_fig == 3:      
         update_inner_pinA(se,sRm, phi)
@@ -709,6 +514,7 @@ def animate(frame):
         dotC.set_visible(0)
         ehypocycloidC.set_visible(0)
         edotC.set_visible(0)        
+        inner_circlesC.set_visible(0)
     if cycloid_fig == 1:          
         update_inner_pinA(se,sRm, phi)
         update_inner_circleA(se,sn,sN,srd,sRd, phi)
@@ -721,10 +527,32 @@ def animate(frame):
         ehypocycloidC.set_visible(0)
         edotB.set_visible(0)
         edotC.set_visible(0)
+        inner_circlesB.set_visible(0)
+        inner_circlesC.set_visible(0)
+    if period:
+        tape.record(slot)
+    if blit:
+        return moving
     fig.canvas.draw_idle()
 
 
-
-ani = animation.FuncAnimation(fig, animate,frames=sli_fm.val*(sli_N.val-1), interval=150)
+moving = [pins, inner_pins, inner_circlesA, inner_circlesB, inner_circlesC,
+          inner_pinA, dotA, inner_pinB, dotB, inner_pinC, dotC,
+          ehypocycloidA, edotA, ehypocycloidB, edotB, ehypocycloidC, edotC,
+          ehypocycloid_Pin, edot_Pin]
+tape = FrameTape(moving)
+timer = FrameTimer(profile_frames or None)
+timer.instrument(globals())
+timer.attach(fig)
+moving += timer.overlay(ax)
+if timer.enabled:
+    fig.canvas.mpl_connect('close_event', lambda event: print('saved', timer.dump('frame_trace.json')))
+ax_la.set_visible(curve_fig == 1)
+undercut_warning(sli_e.val,sli_N.val,sli_D.val,sli_d.val)
+if blit:
+    drive_pin_update(sli_Rm.val)
+    ani = BlitAnimation(fig, timer.frame(animate), sli_fm.val*(sli_N.val-1), 150, moving)
+else:
+    ani = animation.FuncAnimation(fig, timer.frame(animate),frames=sli_fm.val*(sli_N.val-1), interval=150)
 dpi=100
 plt.show()
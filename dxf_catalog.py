@@ -0,0 +1,185 @@
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from cycloid_cad import LAYERS, drive_sketch, write_sketch
+from cycloid_scene import add_drive_args
+
+## batch DXF export of a whole catalog of drive sizes
+#
+# One named DXF per parameter set, same layers as the DXF_Sketch button
+# (Cycloid, Pins, Eccentric, DriveCircle, Center), or SVG / binary
+# polylines with --format. Sets come from a CSV
+# with a header row or a JSON list of objects; missing parameters take the
+# demo1_new defaults and an optional 'name' column names the file.
+#
+# Every file is recorded in <folder>/catalog.json with a hash of its
+# parameters, the export settings and the exporter source, plus the sha256
+# of the file written. A rerun only exports the sets whose hash changed or
+# whose file is missing or was modified since. Entries of rows no longer in
+# the catalog are dropped from catalog.json and listed as stale; their files
+# are left for you to delete.
+#
+#   python dxf_catalog.py sizes.csv -o catalog/
+#   python dxf_catalog.py sizes.json -o catalog/ --mode spline --tol 0.005 -j 0
+#   python dxf_catalog.py sizes.csv -o laser/ --format bin --tol 0.01
+
+KEYS = ['Rm', 'n', 'Rd', 'rd', 'e', 'N', 'd', 'D']
+INTS = {'n', 'N'}
+SOURCES = ['cycloid_cad.py', 'cycloid_geometry.py']
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_catalog(path):
+    # list of parameter dicts, defaults filled in
+    defaults = vars(add_drive_args(argparse.ArgumentParser()).parse_args([]))
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path) as f:
+            rows = json.load(f)
+    else:
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    sets = []
+    for i, row in enumerate(rows):
+        p = {k: defaults[k] for k in KEYS}
+        for k, v in row.items():
+            if k is None or v in (None, ''):
+                continue
+            k = k.strip()
+            if k in KEYS:
+                try:
+                    p[k] = int(float(v)) if k in INTS else float(v)
+                except ValueError:
+                    raise ValueError(f'{path} entry {i + 1}: {k} = {v!r} is not a number') from None
+            elif k == 'name':
+                p['name'] = str(v).strip()
+        sets.append(p)
+    return sets
+
+
+def entry_name(p):
+    if p.get('name'):
+        return re.sub(r'[^\w.-]+', '_', p['name'])
+    return 'N{N}_D{D:g}_d{d:g}_e{e:g}_n{n}_Rd{Rd:g}_rd{rd:g}_Rm{Rm:g}'.format(**p)
+
+
+def source_hash():
+    h = hashlib.sha256()
+    for name in SOURCES:
+        with open(os.path.join(HERE, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def entry_hash(p, tol, mode, family, source, fmt='dxf'):
+    settings = {'p': {k: p[k] for k in KEYS}, 'tol': tol, 'mode': mode, 'family': family, 'format': fmt,
+                'layers': LAYERS, 'source': source}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _export_entry(job):
+    # runs in a worker: one parameter set -> one file, written under a
+    # temporary name first so an interrupted run never leaves a half file
+    p, path, tol, mode, family = job
+    root, ext = os.path.splitext(path)
+    tmp = root + '.tmp' + ext
+    start = time.perf_counter()
+    try:
+        write_sketch(drive_sketch(p, family=family), tmp, tol, mode)
+        os.replace(tmp, path)
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return {'file': os.path.basename(path), 'error': f'{type(e).__name__}: {e}'}
+    return {'file': os.path.basename(path), 'sha256': file_hash(path), 'seconds': time.perf_counter() - start}
+
+
+def run_catalog(sets, folder, tol=1e-3, mode='arcs', family='epitrochoid', jobs=0, force=False, fmt='dxf'):
+    os.makedirs(folder, exist_ok=True)
+    manifest_path = os.path.join(folder, 'catalog.json')
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {'entries': {}}
+    known = manifest['entries']
+
+    source = source_hash()
+    work, skipped, names = [], [], set()
+    for p in sets:
+        name = entry_name(p) + '.' + fmt
+        if name in names:
+            raise ValueError('duplicate catalog entry: ' + name)
+        names.add(name)
+        path = os.path.join(folder, name)
+        key = entry_hash(p, tol, mode, family, source, fmt)
+        old = known.get(name)
+        if (not force and old is not None and old['key'] == key and os.path.exists(path)
+                and file_hash(path) == old['sha256']):
+            skipped.append(name)
+            continue
+        known[name] = {'key': key, 'params': {k: p[k] for k in KEYS}}
+        work.append((p, path, tol, mode, family))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(work) < 2:
+        done = [_export_entry(job) for job in work]
+    else:
+        with multiprocessing.Pool(min(jobs, len(work))) as pool:
+            done = list(pool.imap_unordered(_export_entry, work, chunksize=4))
+
+    stale = sorted(set(known) - names)
+    for name in stale:
+        del known[name]
+    failed = []
+    for res in done:
+        if 'error' in res:
+            failed.append(res)
+            known.pop(res['file'], None)
+        else:
+            known[res['file']]['sha256'] = res['sha256']
+    manifest.update({'tol': tol, 'mode': mode, 'family': family, 'source': source})
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return {'written': len(done) - len(failed), 'skipped': len(skipped), 'failed': failed, 'stale': stale}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='export one DXF sketch per parameter set of a CSV/JSON catalog')
+    parser.add_argument('--format', choices=['dxf', 'svg', 'bin'], default='dxf',
+                        help='DXF (default), SVG or binary float32 polylines')
+    parser.add_argument('catalog', help='.csv with a header row or .json list of objects')
+    parser.add_argument('-o', '--output', default='catalog', help='folder for the exported files and catalog.json')
+    parser.add_argument('--mode', choices=['arcs', 'spline', 'polyline'], default='arcs')
+    parser.add_argument('--tol', type=float, default=1e-3, help='largest deviation of the disc outline in mm')
+    parser.add_argument('-j', '--jobs', type=int, default=0, help='worker processes (0: one per cpu)')
+    parser.add_argument('--force', action='store_true', help='export every entry, unchanged or not')
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    try:
+        sets = read_catalog(args.catalog)
+        res = run_catalog(sets, args.output, args.tol, args.mode, jobs=args.jobs, force=args.force, fmt=args.format)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(f"{res['written']} written, {res['skipped']} unchanged, {len(res['failed'])} failed "
+          f"of {len(sets)} in {time.perf_counter() - start:.1f} s")
+    for f in res['failed']:
+        print('failed', f['file'], f['error'])
+    for name in res['stale']:
+        print('stale', name, '(no longer in the catalog, dropped from catalog.json)')
+    print('saved', args.output)
+    if res['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
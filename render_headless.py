@@ -0,0 +1,170 @@
+import argparse
+import multiprocessing
+import os
+from collections import deque
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from cycloid_export import grab_rgba, open_stream
+from cycloid_scene import DriveScene, add_drive_args, drive_params
+
+## headless batch renderer for the demo1_new drive
+#
+# Figures are plain Agg canvases outside pyplot, so no window is ever opened
+# and render() can also be called from inside the GUI demos.
+#
+#   python render_headless.py --N 12 --e 1.5 -o clip.gif
+#   python render_headless.py -o clip.mp4 --fps 30   (gif if ffmpeg is missing)
+#   python render_headless.py -o frames/frame_%04d.png
+#   python render_headless.py --N 40 --fm 100 -o long.gif --jobs 32
+
+
+def build_parser():
+    parser = add_drive_args(argparse.ArgumentParser(description='render the cycloid drive animation without a GUI'))
+    parser.add_argument('-o', '--output', default='output.gif',
+                        help='.gif, .mp4 or a .png pattern (frame number via %%04d)')
+    parser.add_argument('--frames', type=int, default=None,
+                        help='number of frames (default: one output revolution, fm*(N-1))')
+    parser.add_argument('--fps', type=int, default=20)
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--size', type=float, default=6, help='figure size in inches')
+    parser.add_argument('--samples', type=int, default=5000)
+    parser.add_argument('--tol', type=float, default=None,
+                        help='chord error in mm for adaptive profile sampling')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes rasterizing frames in parallel (0: one per cpu)')
+    return parser
+
+
+def make_scene(p, size=6, samples=5000, tol=None, dpi=100):
+    fig = Figure(figsize=(size, size), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.set_aspect('equal')
+    scene = DriveScene(ax, np.linspace(0, 2*np.pi, samples), tol=tol)
+    scene.set_static(p)
+    return fig, scene
+
+
+def png_pattern(output):
+    if '%' in output:
+        return output
+    root, ext = os.path.splitext(output)
+    return root + '_%04d' + ext
+
+
+def check_output(output):
+    ext = os.path.splitext(output)[1].lower()
+    if ext not in ('.gif', '.mp4', '.png'):
+        raise ValueError('unsupported output type: ' + output)
+    folder = os.path.dirname(output)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return ext
+
+
+def frame_chunks(frames, jobs, longest=16):
+    # contiguous frame ranges, a few per worker so uneven chunks even out
+    # and none longer than longest frames, so a chunk of RGBA copies stays
+    # small
+    count = max(1, min(frames, max(4*jobs, -(-frames//longest))))
+    edges = np.linspace(0, frames, count + 1).astype(int)
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+_worker_scene = {}
+
+
+def _render_chunk(job):
+    # runs in a worker: own Agg figure (kept for the next chunk of the same
+    # render), frames start..stop-1 as RGBA arrays, or straight to disk for
+    # png patterns
+    p, start, stop, size, dpi, samples, tol, pattern = job
+    key = (tuple(sorted(p.items())), size, dpi, samples, tol)
+    if key not in _worker_scene:
+        _worker_scene.clear()
+        _worker_scene[key] = make_scene(p, size, samples, tol, dpi)
+    fig, scene = _worker_scene[key]
+    out = []
+    for frame in scene.play(p, range(start, stop)):
+        if pattern:
+            fig.savefig(pattern % frame, dpi=dpi)
+        else:
+            out.append(grab_rgba(fig).copy())
+    return out
+
+
+def _in_order(pool, func, work, window):
+    # results of func over work in order, with at most window jobs queued
+    # or finished but not yet consumed, so a slow consumer holds the
+    # workers back instead of piling their results up in memory
+    work = iter(work)
+    pending = deque(pool.apply_async(func, (job,)) for _, job in zip(range(window), work))
+    while pending:
+        res = pending.popleft().get()
+        for job in work:
+            pending.append(pool.apply_async(func, (job,)))
+            break
+        yield res
+
+
+def render_parallel(p, output, frames=None, fps=20, dpi=100, size=6, samples=5000, tol=None, jobs=0):
+    # each frame only depends on phi = 2*pi*frame/fm, so the frame range is
+    # split across worker processes and reassembled in order; at most
+    # 2*jobs chunks of frames are held at any time
+    if frames is None:
+        frames = int(p['fm']*(p['N']-1))
+    if frames < 1:
+        raise ValueError(f'nothing to render: {frames} frames (default fm*(N-1)), need at least 1')
+    jobs = jobs or os.cpu_count() or 1
+    ext = check_output(output)
+    pattern = png_pattern(output) if ext == '.png' else None
+    work = [(p, a, b, size, dpi, samples, tol, pattern) for a, b in frame_chunks(frames, jobs)]
+    with multiprocessing.Pool(min(jobs, len(work))) as pool:
+        chunks = _in_order(pool, _render_chunk, work, 2*jobs)
+        if pattern:
+            for _ in chunks:
+                pass
+            return pattern
+        with open_stream(output, fps) as stream:
+            for chunk in chunks:
+                for im in chunk:
+                    stream.write(im)
+        return stream.output
+
+
+def render(p, output, frames=None, fps=20, dpi=100, size=6, samples=5000, tol=None):
+    if frames is None:
+        frames = int(p['fm']*(p['N']-1))
+    if frames < 1:
+        raise ValueError(f'nothing to render: {frames} frames (default fm*(N-1)), need at least 1')
+    ext = check_output(output)
+    fig, scene = make_scene(p, size, samples, tol, dpi)
+    if ext == '.png':
+        pattern = png_pattern(output)
+        for frame in scene.play(p, range(frames)):
+            fig.savefig(pattern % frame, dpi=dpi)
+        return pattern
+    with open_stream(output, fps) as stream:
+        for frame in scene.play(p, range(frames)):
+            stream.write(grab_rgba(fig))
+    return stream.output
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.jobs == 1:
+            out = render(drive_params(args), args.output, args.frames, args.fps,
+                         args.dpi, args.size, args.samples, args.tol)
+        else:
+            out = render_parallel(drive_params(args), args.output, args.frames, args.fps,
+                                  args.dpi, args.size, args.samples, args.tol, args.jobs)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+    print('saved', out)
+
+
+if __name__ == '__main__':
+    main()